@@ -1,13 +1,10 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import os
-import numpy as np
-import json
-import re
-from datetime import datetime, timedelta
-import random
+import sys
 import math
+import threading
 
 app = Flask(__name__)
 
@@ -24,36 +21,160 @@ def after_request(response):
 # Enable debug mode for development
 app.config['DEBUG'] = True
 
+# Make the shared modules in src/ importable
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+from incident_store import IncidentStore
+from geojson_cache import TalukGeoJSONCache
+from spatial_index import SpatialGridIndex, CLUSTER_MAX_ZOOM
+from geocoding import Geocoder
+
 # Load the dataset at startup (update path as needed)
 DATA_PATH = os.path.join(os.path.dirname(__file__), '../modified_dataset.csv')
-df = pd.read_csv(DATA_PATH)
 
-# Load or create GeoJSON data for Mangalore taluks
+# Typed columnar store with precomputed dashboard aggregates
+store = IncidentStore.from_csv(DATA_PATH)
+df = store.frame
+
+# Load GeoJSON data for Mangalore taluks (merged with live incident counts)
 TALUK_GEOJSON_PATH = os.path.join(os.path.dirname(__file__), 'mangalore_taluks.geojson')
+taluk_geojson = TalukGeoJSONCache(
+    TALUK_GEOJSON_PATH,
+    counts_source=store.taluk_stats.incident_counts,
+    version_source=lambda: store.taluk_stats.version
+)
 
-# Convert date columns to datetime
-date_columns = ['Received Date/Time', 'Incident Reported at', 'Action Date/Time', 'Closed At']
-for col in date_columns:
-    if col in df.columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+def json_response(body):
+    """Return a pre-serialized JSON string as a response"""
+    return app.response_class(body, mimetype='application/json')
 
-# Convert time duration columns to minutes for easier calculations
-def parse_duration(duration_str):
-    if pd.isna(duration_str):
-        return np.nan
-    
-    parts = duration_str.split()
-    hours = int(parts[0].replace('h', ''))
-    minutes = int(parts[1].replace('m', ''))
-    seconds = int(parts[2].replace('s', ''))
-    
-    return hours * 60 + minutes + seconds / 60
+# Incident coordinates are resolved from Location/Taluk with a local gazetteer;
+# the gazetteer only has taluk centroids, so most incidents get taluk precision
+GAZETTEER_PATH = os.environ.get(
+    'GAZETTEER_PATH', os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv'))
+GEOCODE_CACHE_PATH = os.environ.get(
+    'GEOCODE_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'data', 'geocode_cache.sqlite'))
+
+def incident_coordinates():
+    """Latitude/longitude per incident from the persistent geocode cache"""
+    geocoder = Geocoder(GAZETTEER_PATH, GEOCODE_CACHE_PATH)
+    try:
+        coords = geocoder.geocode(df['Location'], df['Taluk'])
+    finally:
+        geocoder.close()
+    return coords['latitude'].to_numpy(), coords['longitude'].to_numpy()
 
-if 'Time taken to take Action' in df.columns:
-    df['Action Time Minutes'] = df['Time taken to take Action'].apply(lambda x: parse_duration(x) if pd.notna(x) else np.nan)
+def build_map_records(latitudes, longitudes):
+    """Serialize the map fields of every incident once"""
+    records = pd.DataFrame({
+        'id': df['Sl. No.'],
+        'incident_type': df['Incident Type'],
+        'location': df['Location'],
+        'taluk': df['Taluk'],
+        'reported_at': df['Incident Reported at'].map(lambda x: x.isoformat() if pd.notna(x) else None),
+        'is_closed': df['Closed At'].notna(),
+        'action_remarks': df['Action Remarks'],
+        'latitude': latitudes,
+        'longitude': longitudes
+    }).astype(object)
+    return records.where(records.notna(), None).to_dict(orient='records')
 
-if 'Time taken to Close' in df.columns:
-    df['Close Time Minutes'] = df['Time taken to Close'].apply(lambda x: parse_duration(x) if pd.notna(x) else np.nan)
+# Map records and spatial index, built on the first map request
+map_data = {}
+map_data_lock = threading.Lock()
+
+def get_map_data():
+    """Geocode incidents and build the map records and spatial index once"""
+    with map_data_lock:
+        if not map_data:
+            latitudes, longitudes = incident_coordinates()
+            map_data['records'] = build_map_records(latitudes, longitudes)
+            map_data['index'] = SpatialGridIndex(latitudes, longitudes)
+    return map_data['records'], map_data['index']
+
+# Zoom used when the map request does not give one (district-wide view, clustered)
+DEFAULT_MAP_ZOOM = 9
+
+# Number of records serialized per chunk when streaming incidents
+STREAM_BATCH_SIZE = 500
+
+STREAM_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+def get_stream_format():
+    """Pick the stream format from the format parameter or the Accept header"""
+    fmt = request.args.get('format')
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+        fmt = 'ndjson' if best == 'application/x-ndjson' else 'json'
+    if fmt not in STREAM_MIMETYPES:
+        raise ValueError(f"Unsupported format '{fmt}' (expected 'json' or 'ndjson')")
+    return fmt
+
+def get_int_arg(name, default=None):
+    """Read an optional integer query parameter"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Parameter '{name}' must be an integer")
+
+def get_date_arg(name, end_of_range=False):
+    """
+    Read an optional date/time query parameter as int64 nanoseconds.
+
+    A date without a time used as the end of a range covers the whole day.
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except ValueError:
+        raise ValueError(f"Parameter '{name}' must be a date or ISO timestamp")
+    if end_of_range and len(value) <= 10:
+        timestamp += pd.Timedelta(days=1)
+    return int(timestamp.value)
+
+def filter_incidents(incident_type=None):
+    """
+    Row positions matching the type, taluk, start, end and status parameters,
+    ordered by Sl. No. and starting after the 'after' cursor.
+    """
+    rows = store.filter(
+        incident_type=incident_type or request.args.get('type'),
+        taluk=request.args.get('taluk'),
+        start=get_date_arg('start'),
+        end=get_date_arg('end', end_of_range=True),
+        status=request.args.get('status')
+    )
+    return store.positions_after(get_int_arg('after'), rows)
+
+def stream_records(positions, fmt):
+    """
+    Stream the given rows as a JSON array or NDJSON, one batch at a time.
+
+    Only one batch of records is serialized in memory at any point.
+    """
+    def generate():
+        if fmt == 'json':
+            yield '['
+        first = True
+        for start in range(0, len(positions), STREAM_BATCH_SIZE):
+            batch = df.iloc[positions[start:start + STREAM_BATCH_SIZE]]
+            if fmt == 'ndjson':
+                yield batch.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+            else:
+                body = batch.to_json(orient='records')[1:-1]
+                yield body if first else ',' + body
+                first = False
+        if fmt == 'json':
+            yield ']'
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_MIMETYPES[fmt])
 
 @app.route('/')
 def index():
@@ -61,9 +182,15 @@ def index():
 
 @app.route('/api/incidents', methods=['GET'])
 def get_incidents():
-    # Return all incidents (limit for safety)
-    limit = int(request.args.get('limit', df.shape[0]))
-    return df.head(limit).to_json(orient='records')
+    # Stream incidents in Sl. No. order; 'after' resumes from a previous Sl. No.
+    # Optional filters: type, taluk, start, end (Incident Reported at) and status
+    try:
+        fmt = get_stream_format()
+        limit = get_int_arg('limit')
+        positions = filter_incidents()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return stream_records(positions[:limit], fmt)
 
 @app.route('/api/incident_types', methods=['GET'])
 def get_incident_types():
@@ -84,305 +211,72 @@ def get_incidents_by_type():
     incident_type = request.args.get('type')
     if not incident_type:
         return jsonify({'error': 'Missing type parameter'}), 400
-    filtered = df[df['Incident Type'] == incident_type]
-    return filtered.to_json(orient='records')
+    try:
+        fmt = get_stream_format()
+        limit = get_int_arg('limit')
+        positions = filter_incidents(incident_type)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return stream_records(positions[:limit], fmt)
 
 # Dashboard API endpoints
+# KPI, temporal, breakdown and response payloads are precomputed by the store
 @app.route('/api/dashboard/kpi', methods=['GET'])
 def get_dashboard_kpi():
-    total_incidents = int(len(df))
-    resolved_incidents = int(df['Closed At'].notna().sum())
-    pending_incidents = int(total_incidents - resolved_incidents)
-    
-    # Calculate SLA compliance rate (assuming SLA is 24 hours for action and 48 hours for closure)
-    action_sla_hours = 24
-    closure_sla_hours = 48
-    
-    # Action SLA compliance
-    action_compliant = int(df[df['Action Time Minutes'].notna() & (df['Action Time Minutes'] <= action_sla_hours * 60)].shape[0])
-    action_total = int(df['Action Time Minutes'].notna().sum())
-    action_sla_rate = float((action_compliant / action_total * 100) if action_total > 0 else 0)
-    
-    # Closure SLA compliance
-    closure_compliant = int(df[df['Close Time Minutes'].notna() & (df['Close Time Minutes'] <= closure_sla_hours * 60)].shape[0])
-    closure_total = int(df['Close Time Minutes'].notna().sum())
-    closure_sla_rate = float((closure_compliant / closure_total * 100) if closure_total > 0 else 0)
-    
-    # Average times
-    avg_action_time = float(df['Action Time Minutes'].mean()) if not pd.isna(df['Action Time Minutes'].mean()) else 0
-    avg_closure_time = float(df['Close Time Minutes'].mean()) if not pd.isna(df['Close Time Minutes'].mean()) else 0
-    
-    # Top 5 incident types - convert NumPy types to Python native types
-    incident_counts = df['Incident Type'].value_counts().head(5)
-    top_incident_types = {str(k): int(v) for k, v in incident_counts.items()}
-    
-    # Top 5 taluks - convert NumPy types to Python native types
-    # Handle case where 'Taluk' column might not exist
-    if 'Taluk' in df.columns:
-        taluk_counts = df['Taluk'].value_counts().head(5)
-        top_taluks = {str(k): int(v) for k, v in taluk_counts.items()}
-    else:
-        top_taluks = {}
-    
-    return jsonify({
-        'total_incidents': total_incidents,
-        'resolved_incidents': resolved_incidents,
-        'pending_incidents': pending_incidents,
-        'action_sla_rate': action_sla_rate,
-        'closure_sla_rate': closure_sla_rate,
-        'avg_action_time_minutes': avg_action_time,
-        'avg_closure_time_minutes': avg_closure_time,
-        'top_incident_types': top_incident_types,
-        'top_taluks': top_taluks
-    })
+    return json_response(store.serialized('kpi'))
 
 @app.route('/api/dashboard/temporal', methods=['GET'])
 def get_temporal_trends():
-    # Incidents per day
-    df['date'] = df['Incident Reported at'].dt.date
-    incidents_per_day = df.groupby('date').size().reset_index(name='count')
-    incidents_per_day['date'] = incidents_per_day['date'].astype(str)
-    # Convert count column to int
-    incidents_per_day['count'] = incidents_per_day['count'].astype(int)
-    
-    # Incidents per week
-    df['week'] = df['Incident Reported at'].dt.isocalendar().week
-    df['year'] = df['Incident Reported at'].dt.isocalendar().year
-    df['year_week'] = df['year'].astype(str) + '-' + df['week'].astype(str)
-    incidents_per_week = df.groupby('year_week').size().reset_index(name='count')
-    # Convert count column to int
-    incidents_per_week['count'] = incidents_per_week['count'].astype(int)
-    
-    # Incidents per month
-    df['month'] = df['Incident Reported at'].dt.month
-    df['year_month'] = df['year'].astype(str) + '-' + df['month'].astype(str)
-    incidents_per_month = df.groupby('year_month').size().reset_index(name='count')
-    # Convert count column to int
-    incidents_per_month['count'] = incidents_per_month['count'].astype(int)
-    
-    # Monsoon vs non-monsoon analysis (assuming June-September is monsoon season)
-    df['is_monsoon'] = df['Incident Reported at'].dt.month.isin([6, 7, 8, 9])
-    monsoon_analysis = df.groupby('is_monsoon').size().reset_index(name='count')
-    monsoon_analysis['season'] = monsoon_analysis['is_monsoon'].map({True: 'Monsoon', False: 'Non-Monsoon'})
-    # Convert count column to int
-    monsoon_analysis['count'] = monsoon_analysis['count'].astype(int)
-    
-    # Hour of day analysis
-    df['hour'] = df['Incident Reported at'].dt.hour
-    hour_analysis = df.groupby('hour').size().reset_index(name='count')
-    # Convert hour and count columns to int
-    hour_analysis['hour'] = hour_analysis['hour'].astype(int)
-    hour_analysis['count'] = hour_analysis['count'].astype(int)
-    
-    # Day of week analysis
-    df['day_of_week'] = df['Incident Reported at'].dt.dayofweek
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    day_analysis = df.groupby('day_of_week').size().reset_index(name='count')
-    day_analysis['day_name'] = day_analysis['day_of_week'].apply(lambda x: day_names[x])
-    # Convert count column to int
-    day_analysis['count'] = day_analysis['count'].astype(int)
-    
-    # Convert DataFrames to dictionaries with native Python types
-    incidents_per_day_dict = []
-    for _, row in incidents_per_day.iterrows():
-        incidents_per_day_dict.append({'date': str(row['date']), 'count': int(row['count'])})
-    
-    incidents_per_week_dict = []
-    for _, row in incidents_per_week.iterrows():
-        incidents_per_week_dict.append({'year_week': str(row['year_week']), 'count': int(row['count'])})
-    
-    incidents_per_month_dict = []
-    for _, row in incidents_per_month.iterrows():
-        incidents_per_month_dict.append({'year_month': str(row['year_month']), 'count': int(row['count'])})
-    
-    monsoon_analysis_dict = []
-    for _, row in monsoon_analysis[['season', 'count']].iterrows():
-        monsoon_analysis_dict.append({'season': str(row['season']), 'count': int(row['count'])})
-    
-    hour_analysis_dict = []
-    for _, row in hour_analysis.iterrows():
-        hour_analysis_dict.append({'hour': int(row['hour']), 'count': int(row['count'])})
-    
-    day_analysis_dict = []
-    for _, row in day_analysis[['day_name', 'count']].iterrows():
-        day_analysis_dict.append({'day_name': str(row['day_name']), 'count': int(row['count'])})
-    
-    return jsonify({
-        'incidents_per_day': incidents_per_day_dict,
-        'incidents_per_week': incidents_per_week_dict,
-        'incidents_per_month': incidents_per_month_dict,
-        'monsoon_analysis': monsoon_analysis_dict,
-        'hour_analysis': hour_analysis_dict,
-        'day_analysis': day_analysis_dict
-    })
+    return json_response(store.serialized('temporal'))
 
 @app.route('/api/dashboard/breakdown', methods=['GET'])
 def get_incident_breakdown():
-    # Incident Type breakdown
-    incident_type_counts = df['Incident Type'].value_counts().reset_index()
-    incident_type_counts.columns = ['type', 'count']
-    # Convert count column to int
-    incident_type_counts['count'] = incident_type_counts['count'].astype(int)
-    
-    # Info_Source breakdown
-    if 'Info_Source' in df.columns:
-        info_source_counts = df['Info_Source'].value_counts().reset_index()
-        info_source_counts.columns = ['source', 'count']
-        # Convert count column to int
-        info_source_counts['count'] = info_source_counts['count'].astype(int)
-        
-        # Create a "Channel" from Info_Source (simplified categorization)
-        def categorize_channel(source):
-            source = str(source).lower()
-            if 'phone' in source or any(digit in source for digit in '0123456789'):
-                return 'Phone'
-            elif 'app' in source or 'web' in source or 'online' in source:
-                return 'App/Web'
-            elif 'pdo' in source or 'officer' in source or 'official' in source:
-                return 'Official'
-            else:
-                return 'Other'
-        
-        df['Channel'] = df['Info_Source'].apply(categorize_channel)
-        channel_counts = df['Channel'].value_counts().reset_index()
-        channel_counts.columns = ['channel', 'count']
-        # Convert count column to int
-        channel_counts['count'] = channel_counts['count'].astype(int)
-    else:
-        # Create empty DataFrames if columns don't exist
-        info_source_counts = pd.DataFrame(columns=['source', 'count'])
-        channel_counts = pd.DataFrame(columns=['channel', 'count'])
-    
-    # Taluk and Type hierarchical data for treemap/sunburst
-    if 'Taluk' in df.columns:
-        taluk_type_counts = df.groupby(['Taluk', 'Incident Type']).size().reset_index(name='count')
-        # Convert count column to int
-        taluk_type_counts['count'] = taluk_type_counts['count'].astype(int)
-    else:
-        taluk_type_counts = pd.DataFrame(columns=['Taluk', 'Incident Type', 'count'])
-    
-    # Convert DataFrames to dictionaries with native Python types
-    incident_type_dict = []
-    for _, row in incident_type_counts.iterrows():
-        incident_type_dict.append({'type': str(row['type']), 'count': int(row['count'])})
-    
-    info_source_dict = []
-    for _, row in info_source_counts.iterrows():
-        info_source_dict.append({'source': str(row['source']), 'count': int(row['count'])})
-    
-    channel_dict = []
-    for _, row in channel_counts.iterrows():
-        channel_dict.append({'channel': str(row['channel']), 'count': int(row['count'])})
-    
-    taluk_type_dict = []
-    for _, row in taluk_type_counts.iterrows():
-        taluk_type_dict.append({
-            'Taluk': str(row['Taluk']) if 'Taluk' in row else '',
-            'Incident Type': str(row['Incident Type']) if 'Incident Type' in row else '',
-            'count': int(row['count']) if 'count' in row else 0
-        })
-    
-    return jsonify({
-        'incident_type_breakdown': incident_type_dict,
-        'info_source_breakdown': info_source_dict,
-        'channel_breakdown': channel_dict,
-        'taluk_type_hierarchy': taluk_type_dict
-    })
+    return json_response(store.serialized('breakdown'))
 
 @app.route('/api/dashboard/response', methods=['GET'])
 def get_response_analytics():
-    # Distribution of response times
-    action_time_distribution = df['Action Time Minutes'].dropna().tolist()
-    closure_time_distribution = df['Close Time Minutes'].dropna().tolist()
-    
-    # Convert NumPy types to Python native types
-    action_time_distribution = [float(x) for x in action_time_distribution]
-    closure_time_distribution = [float(x) for x in closure_time_distribution]
-    
-    # Identify outliers (slowest 1%)
-    action_outlier_threshold = float(np.percentile(action_time_distribution, 99)) if action_time_distribution else 0
-    closure_outlier_threshold = float(np.percentile(closure_time_distribution, 99)) if closure_time_distribution else 0
-    
-    action_outliers = int(df[df['Action Time Minutes'] > action_outlier_threshold].shape[0]) if action_time_distribution else 0
-    closure_outliers = int(df[df['Close Time Minutes'] > closure_outlier_threshold].shape[0]) if closure_time_distribution else 0
-    
-    # Officer leaderboard
-    if 'Closed By Officer' in df.columns:
-        officer_counts = df.groupby('Closed By Officer').size().reset_index(name='incidents_closed')
-        officer_avg_time = df.groupby('Closed By Officer')['Close Time Minutes'].mean().reset_index(name='avg_closure_time')
-        
-        # Convert count and avg_time to native Python types
-        officer_counts['incidents_closed'] = officer_counts['incidents_closed'].astype(int)
-        officer_avg_time['avg_closure_time'] = officer_avg_time['avg_closure_time'].apply(
-            lambda x: float(x) if not pd.isna(x) else 0
-        )
-        
-        officer_leaderboard = pd.merge(officer_counts, officer_avg_time, on='Closed By Officer')
-        officer_leaderboard = officer_leaderboard.sort_values('incidents_closed', ascending=False)
-        officer_leaderboard = officer_leaderboard.dropna(subset=['Closed By Officer'])
-        officer_leaderboard = officer_leaderboard.head(10)
-        
-        # Convert to list of dictionaries with native Python types
-        officer_leaderboard_list = []
-        for _, row in officer_leaderboard.iterrows():
-            officer_leaderboard_list.append({
-                'Closed By Officer': str(row['Closed By Officer']),
-                'incidents_closed': int(row['incidents_closed']),
-                'avg_closure_time': float(row['avg_closure_time'])
-            })
-    else:
-        officer_leaderboard_list = []
-    
-    return jsonify({
-        'action_time_distribution': {
-            'data': action_time_distribution,
-            'outlier_threshold': action_outlier_threshold,
-            'outlier_count': action_outliers
-        },
-        'closure_time_distribution': {
-            'data': closure_time_distribution,
-            'outlier_threshold': closure_outlier_threshold,
-            'outlier_count': closure_outliers
-        },
-        'officer_leaderboard': officer_leaderboard_list
-    })
+    return json_response(store.serialized('response'))
+
+# Largest page the details table may request
+MAX_PAGE_SIZE = 100
 
 @app.route('/api/dashboard/details', methods=['GET'])
 def get_incident_details():
-    # Paginated table data
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('page_size', 10))
-    
-    start_idx = (page - 1) * page_size
+    # Paginated table data, optionally sorted; 'cursor' is the Sl. No. of the
+    # last row of the previous page (for the same sort)
+    try:
+        page = get_int_arg('page', 1)
+        page_size = get_int_arg('page_size', 10)
+        cursor = get_int_arg('cursor')
+        if page < 1:
+            raise ValueError("Parameter 'page' must be at least 1")
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            raise ValueError(f"Parameter 'page_size' must be between 1 and {MAX_PAGE_SIZE}")
+        order_param = request.args.get('order', 'asc')
+        if order_param not in ('asc', 'desc'):
+            raise ValueError("Parameter 'order' must be 'asc' or 'desc'")
+        sort_by = request.args.get('sort')
+        order, rank = store.sort_order(sort_by, descending=order_param == 'desc')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if cursor is not None:
+        row = store.row_for_id(cursor)
+        if row is None:
+            return jsonify({'error': f"Unknown cursor {cursor}"}), 400
+        start_idx = int(rank[row]) + 1
+        page = start_idx // page_size + 1
+    else:
+        start_idx = (page - 1) * page_size
     end_idx = start_idx + page_size
     
     total_incidents = int(len(df))
     total_pages = int((total_incidents + page_size - 1) // page_size)
     
-    # Get subset of data for the current page
-    page_data = df.iloc[start_idx:end_idx]
-    
-    # Convert to dict for JSON serialization
-    incidents = []
-    for _, row in page_data.iterrows():
-        incident = {}
-        for col in df.columns:
-            val = row[col]
-            if isinstance(val, (pd.Timestamp, datetime)):
-                incident[col] = val.isoformat()
-            elif pd.isna(val):
-                incident[col] = None
-            elif isinstance(val, np.integer):
-                incident[col] = int(val)
-            elif isinstance(val, np.floating):
-                incident[col] = float(val)
-            elif isinstance(val, np.bool_):
-                incident[col] = bool(val)
-            elif isinstance(val, np.ndarray):
-                incident[col] = val.tolist()
-            else:
-                incident[col] = val
-        incidents.append(incident)
+    # Serialize only the rows of the current page
+    page_rows = order[start_idx:end_idx]
+    incidents = store.records(page_rows)
+    next_cursor = int(store.ids[page_rows[-1]]) if end_idx < total_incidents and len(page_rows) else None
     
     return jsonify({
         'incidents': incidents,
@@ -390,217 +284,71 @@ def get_incident_details():
             'page': page,
             'page_size': page_size,
             'total_incidents': total_incidents,
-            'total_pages': total_pages
+            'total_pages': total_pages,
+            'sort': sort_by,
+            'order': order_param,
+            'next_cursor': next_cursor
         }
     })
 
 # Map-related API endpoints
 @app.route('/api/map/incidents', methods=['GET'])
 def get_map_incidents():
+    # Optional bbox=min_lng,min_lat,max_lng,max_lat and zoom (default DEFAULT_MAP_ZOOM);
+    # clusters below CLUSTER_MAX_ZOOM, individual incidents in a bbox at or above it
     try:
-        # Create a simplified version with mock data for demonstration
-        # This avoids potential issues with the real dataset
-        incidents = []
-        
-        # Mangalore center coordinates
-        mangalore_center = (12.8698, 74.8431)
-        
-        # Dictionary to store taluk centers
-        taluk_centers = {
-            'Ullala': (12.8050, 74.8460),
-            'Belthangady': (13.0167, 75.3000),
-            'Buntwal': (12.9067, 75.0367),
-            'Sullia': (12.5606, 75.3872),
-            'Puttur': (12.7600, 75.2000),
-            'Kadaba': (12.8667, 75.1167),
-            'Mangaluru': (12.8698, 74.8431),
-            'Mulki': (13.0833, 74.7833),
-            'Mangaluru City Corporation': (12.8698, 74.8431),
-            'Mudabidri': (13.0667, 74.9833)
-        }
-        
-        # Function to generate random coordinates around a center point
-        def generate_coordinates(center, max_distance_km=10):
-            # Convert km to degrees (approximate)
-            max_lat_change = max_distance_km / 111.0  # 1 degree latitude is approximately 111 km
-            max_lng_change = max_distance_km / (111.0 * math.cos(math.radians(center[0])))
-            
-            # Generate random offsets
-            lat_offset = random.uniform(-max_lat_change, max_lat_change)
-            lng_offset = random.uniform(-max_lng_change, max_lng_change)
-            
-            # Apply offsets to center coordinates
-            return (center[0] + lat_offset, center[1] + lng_offset)
-        
-        # Get unique incident types from the dataset
-        incident_types = df['Incident Type'].unique().tolist()
-        
-        # Get unique taluks from the dataset
-        taluks = df['Taluk'].unique().tolist()
-        
-        # Generate 100 sample incidents
-        for i in range(1, 101):
-            # Select a random incident type and taluk
-            incident_type = random.choice(incident_types)
-            taluk = random.choice(taluks)
-            
-            # Generate coordinates based on taluk
-            if taluk in taluk_centers:
-                coords = generate_coordinates(taluk_centers[taluk])
-            else:
-                coords = generate_coordinates(mangalore_center)
-            
-            # Create a sample incident
-            incident = {
-                'id': i,
-                'incident_type': incident_type,
-                'location': f'Sample location in {taluk}',
-                'taluk': taluk,
-                'reported_at': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
-                'is_closed': random.choice([True, False]),
-                'action_remarks': 'Sample action taken' if random.random() > 0.3 else None,
-                'latitude': coords[0],
-                'longitude': coords[1]
-            }
-            
-            incidents.append(incident)
-        
-        return jsonify({'incidents': incidents})
-    except Exception as e:
-        print(f"Error in get_map_incidents: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        zoom = get_int_arg('zoom')
+        bbox = request.args.get('bbox')
+        if bbox is not None:
+            bbox = tuple(float(value) for value in bbox.split(','))
+            if len(bbox) != 4:
+                raise ValueError("Parameter 'bbox' must be min_lng,min_lat,max_lng,max_lat")
+            if not all(math.isfinite(value) for value in bbox):
+                raise ValueError("Parameter 'bbox' must contain finite numbers")
+        if zoom is None:
+            zoom = DEFAULT_MAP_ZOOM
+        if zoom >= CLUSTER_MAX_ZOOM and bbox is None:
+            raise ValueError(f"Parameter 'bbox' is required at zoom {CLUSTER_MAX_ZOOM} and above")
+        map_records, map_index = get_map_data()
+        clusters, rows = map_index.query(zoom, bbox)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'clusters': clusters,
+        'incidents': [map_records[row] for row in rows]
+    })
 
 @app.route('/api/map/taluks', methods=['GET'])
 def get_taluks_geojson():
     try:
-        # Create a simplified GeoJSON for Mangalore taluks directly in memory
-        # This avoids file system issues
-        
-        # Get unique taluks from the dataset
-        taluks = df['Taluk'].dropna().unique().tolist()
-        
-        # Count incidents per taluk
-        taluk_counts = df['Taluk'].value_counts().to_dict()
-        
-        # Create a simplified GeoJSON structure
-        features = []
-        
-        # Taluk center coordinates (approximate)
-        taluk_centers = {
-            'Ullala': (12.8050, 74.8460),
-            'Belthangady': (13.0167, 75.3000),
-            'Buntwal': (12.9067, 75.0367),
-            'Sullia': (12.5606, 75.3872),
-            'Puttur': (12.7600, 75.2000),
-            'Kadaba': (12.8667, 75.1167),
-            'Mangaluru': (12.8698, 74.8431),
-            'Mulki': (13.0833, 74.7833),
-            'Mangaluru City Corporation': (12.8698, 74.8431),
-            'Mudabidri': (13.0667, 74.9833)
-        }
-        
-        # Function to generate a simple polygon around a center point
-        def generate_polygon(center, radius_km=5):
-            # Convert km to degrees (approximate)
-            radius_lat = radius_km / 111.0
-            radius_lng = radius_km / (111.0 * math.cos(math.radians(center[0])))
-            
-            # Generate points in a rough circle
-            points = []
-            num_points = 8
-            for i in range(num_points):
-                angle = 2 * math.pi * i / num_points
-                lat = center[0] + radius_lat * math.cos(angle) * (0.8 + 0.4 * random.random())
-                lng = center[1] + radius_lng * math.sin(angle) * (0.8 + 0.4 * random.random())
-                points.append([lng, lat])  # GeoJSON uses [longitude, latitude]
-            
-            # Close the polygon
-            points.append(points[0])
-            
-            return [points]
-        
-        # Create features for each taluk
-        for taluk in taluks:
-            if taluk in taluk_centers:
-                center = taluk_centers[taluk]
-                polygon = generate_polygon(center)
-                
-                # Get incident count for this taluk
-                incident_count = taluk_counts.get(taluk, 0)
-                
-                feature = {
-                    "type": "Feature",
-                    "properties": {
-                        "name": taluk,
-                        "incidentCount": incident_count
-                    },
-                    "geometry": {
-                        "type": "Polygon",
-                        "coordinates": polygon
-                    }
-                }
-                features.append(feature)
-        
-        # Create the GeoJSON structure
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        return jsonify(geojson)
-    except Exception as e:
-        print(f"Error in get_taluks_geojson: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        # Optional zoom level for simplified boundaries
+        zoom = get_int_arg('zoom')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    cached = taluk_geojson.get(zoom)
+    use_gzip = 'gzip' in request.accept_encodings
+    etag = cached.gzip_etag if use_gzip else cached.etag
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(cached.gzipped if use_gzip else cached.body, mimetype='application/json')
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/api/map/taluk_stats/<taluk_name>', methods=['GET'])
 def get_taluk_stats(taluk_name):
-    try:
-        # Generate mock statistics for the specified taluk
-        # This avoids issues with the real dataset
-        
-        # Get unique incident types from the dataset
-        incident_types = df['Incident Type'].unique().tolist()
-        
-        # Generate random statistics
-        total_incidents = random.randint(50, 300)
-        resolved_incidents = random.randint(20, total_incidents)
-        pending_incidents = total_incidents - resolved_incidents
-        avg_response_time = round(random.uniform(1, 24), 2)  # hours
-        
-        # Generate incident type breakdown
-        incident_type_counts = {}
-        remaining = total_incidents
-        for incident_type in incident_types[:-1]:
-            if remaining <= 0:
-                break
-            count = random.randint(1, remaining // 2)
-            incident_type_counts[incident_type] = count
-            remaining -= count
-        
-        # Assign the rest to the last incident type
-        if remaining > 0 and incident_types:
-            incident_type_counts[incident_types[-1]] = remaining
-        
-        # Generate monthly trend (1-12 for months)
-        monthly_trend = {}
-        for month in range(1, 13):
-            monthly_trend[month] = random.randint(0, 30)
-        
-        # Convert to response format
-        response = {
-            'taluk_name': taluk_name,
-            'total_incidents': total_incidents,
-            'resolved_incidents': resolved_incidents,
-            'pending_incidents': pending_incidents,
-            'avg_response_time': avg_response_time,
-            'incident_types': {str(k): int(v) for k, v in incident_type_counts.items()},
-            'monthly_trend': {str(k): int(v) for k, v in monthly_trend.items()}
-        }
-        
-        return jsonify(response)
-    except Exception as e:
-        print(f"Error in get_taluk_stats: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    # Precomputed from the dataset by the incident store
+    body = store.taluk_stats.serialized(taluk_name)
+    if body is None:
+        return jsonify({'error': f"Unknown taluk '{taluk_name}'"}), 404
+    return json_response(body)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,130 @@
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from embedding_cache import normalize_query
+
+def content_digest(paths: List[str]) -> str:
+    """
+    Content hash of a set of files, used to tie cached answers to one build of the vector store.
+
+    Args:
+        paths (List[str]): Files to hash, in a fixed order
+
+    Returns:
+        str: Hex sha1 digest
+    """
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Size- and TTL-bounded cache of query answers.
+
+        Concurrent requests for the same key are coalesced so the answer is
+        generated only once.
+
+        Args:
+            max_entries (int): Maximum number of cached answers
+            ttl_seconds (float): Time after which an answer is regenerated
+            clock (Callable): Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def key(query: str, num_chunks: int, model: str, index_digest: str,
+            filters: Optional[Dict[str, Any]] = None) -> Tuple:
+        """
+        Cache key of a query (with its metadata filters) against one build of the vector store.
+        """
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        filters_key = json.dumps(filters, sort_keys=True, default=str) if filters else None
+        return (normalize_query(query), num_chunks, model, index_digest, filters_key)
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Cached value for a key, computing it if missing or expired.
+
+        Args:
+            key (Tuple): Cache key (see AnswerCache.key)
+            compute (Callable): Produces the value on a miss
+
+        Returns:
+            Tuple[Any, bool]: The value and whether it was served without computing it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.clock() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, True
+                del self._entries[key]
+                self.expired += 1
+
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = Future()
+                self._pending[key] = future
+                self.misses += 1
+                owner = True
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            value = compute()
+        except BaseException as e:
+            # Waiters see the same error; nothing is cached
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._pending[key]
+            self._entries[key] = (self.clock(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and size of the cache.
+        """
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'coalesced': self.coalesced,
+            'misses': self.misses,
+            'expired': self.expired,
+            'in_flight': len(self._pending),
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
@@ -1,11 +1,19 @@
 import os
 import json
+import time
+import asyncio
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from datetime import date
+from typing import Dict, Any, List, Optional, Union
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
-from retriever import IncidentRetriever
+from retriever import IncidentRetriever, BATCH_LLM_CONCURRENCY
+from answer_cache import AnswerCache
+from query_executor import QueryExecutor, QueryRejected
+from llm_pool import UnknownModelError
+from fake_llm import FAKE_MODEL_NAME
 
 # Create FastAPI app
 app = FastAPI(
@@ -27,14 +35,56 @@ app.add_middleware(
 current_dir = os.path.dirname(os.path.abspath(__file__))
 data_dir = os.path.join(os.path.dirname(current_dir), "data")
 vector_store_dir = os.path.join(data_dir, "vector_store")
+embedding_cache_path = os.path.join(data_dir, "query_embeddings.sqlite")
 
 retriever = None
 
+# Ollama models that can be requested ("fake" is also accepted for offline testing)
+AVAILABLE_MODELS = ["mistral", "llama2", "llama2:13b", "llama2:70b", "gemma:2b", "gemma:7b"]
+
+# Answers to repeated questions are reused for up to an hour
+answer_cache = AnswerCache(max_entries=256, ttl_seconds=3600)
+
+# Blocking query work runs on a bounded worker pool, off the event loop
+QUERY_WORKERS = int(os.environ.get("QUERY_WORKERS", 2))
+QUERY_QUEUE_SIZE = int(os.environ.get("QUERY_QUEUE_SIZE", 8))
+QUERY_TIMEOUT_SECONDS = float(os.environ.get("QUERY_TIMEOUT_SECONDS", 120))
+QUERY_RETRY_AFTER_SECONDS = 5
+
+# Token budget of the incident context in each prompt
+CONTEXT_TOKENS = int(os.environ.get("CONTEXT_TOKENS", 1500))
+query_executor = QueryExecutor(QUERY_WORKERS, QUERY_QUEUE_SIZE, QUERY_TIMEOUT_SECONDS)
+
+# Batches run on their own pool so they do not hold up interactive queries
+QUERY_BATCH_MAX_QUERIES = int(os.environ.get("QUERY_BATCH_MAX_QUERIES", 100))
+QUERY_BATCH_LLM_CONCURRENCY = int(os.environ.get("QUERY_BATCH_LLM_CONCURRENCY", BATCH_LLM_CONCURRENCY))
+QUERY_BATCH_TIMEOUT_SECONDS = float(os.environ.get("QUERY_BATCH_TIMEOUT_SECONDS", 1800))
+batch_executor = QueryExecutor(1, int(os.environ.get("QUERY_BATCH_QUEUE_SIZE", 2)), QUERY_BATCH_TIMEOUT_SECONDS)
+
 # Pydantic models
+class QueryFilters(BaseModel):
+    taluk: Optional[Union[str, List[str]]] = None
+    incident_type: Optional[Union[str, List[str]]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
 class QueryRequest(BaseModel):
     query: str
     num_chunks: int = 5
     model: str = "mistral"
+    filters: Optional[QueryFilters] = None
+    
+    def filter_dict(self) -> Optional[Dict[str, Any]]:
+        return self.filters.dict(exclude_none=True) if self.filters else None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    num_chunks: int = 5
+    model: str = "mistral"
+    filters: Optional[QueryFilters] = None
+    
+    def filter_dict(self) -> Optional[Dict[str, Any]]:
+        return self.filters.dict(exclude_none=True) if self.filters else None
 
 class QueryResponse(BaseModel):
     query: str
@@ -42,6 +92,13 @@ class QueryResponse(BaseModel):
     relevant_chunks: List[Dict[str, Any]]
     num_chunks_retrieved: int
     processing_time_ms: float
+    cached: bool = False
+    retrieval_mode: Optional[str] = None
+    route: str = "rag"
+    intent: Optional[str] = None
+    aggregate: Optional[Dict[str, Any]] = None
+    prompt_tokens: Optional[int] = None
+    context: Optional[Dict[str, Any]] = None
 
 @app.on_event("startup")
 async def startup_event():
@@ -49,11 +106,24 @@ async def startup_event():
     global retriever
     try:
         # Initialize retriever with default model
-        retriever = IncidentRetriever(vector_store_dir, model_name="mistral")
-        retriever.load_resources()
+        retriever = IncidentRetriever(
+            vector_store_dir,
+            model_name="mistral",
+            embedding_cache_path=embedding_cache_path,
+            models=AVAILABLE_MODELS + [FAKE_MODEL_NAME],
+            context_tokens=CONTEXT_TOKENS
+        )
+        # Components load in the background; /health reports their progress
+        retriever.start_loading()
     except Exception as e:
         print(f"Error initializing retriever: {str(e)}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the query workers"""
+    query_executor.shutdown()
+    batch_executor.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -68,46 +138,181 @@ async def health_check():
     """Health check endpoint"""
     if retriever is None:
         raise HTTPException(status_code=503, detail="Retriever not initialized")
-    return {"status": "healthy"}
+    components = retriever.readiness()
+    statuses = {component["status"] for component in components.values()}
+    if statuses == {"ready"}:
+        return {"status": "healthy", "components": components}
+    status = "unhealthy" if "failed" in statuses else "loading"
+    return JSONResponse({"status": status, "components": components}, status_code=503)
+
+def answer_query(request: QueryRequest):
+    """Answer a query from the cache or the retriever (runs on a query worker)"""
+    filters = request.filter_dict()
+    key = AnswerCache.key(request.query, request.num_chunks, request.model, retriever.index_digest, filters)
+    return answer_cache.get_or_compute(
+        key, lambda: retriever.process_query(request.query, k=request.num_chunks, model=request.model,
+                                             filters=filters)
+    )
 
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     """
     Process a natural language query about incidents
     """
-    import time
-    
     if retriever is None:
         raise HTTPException(status_code=503, detail="Retriever not initialized")
     
-    # Update model if different from current
-    if request.model != retriever.model_name:
-        retriever.model_name = request.model
-        retriever.llm = None  # Force reinitialization
+    try:
+        retriever.llm_pool.validate(request.model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Process query
     start_time = time.time()
     try:
-        response = retriever.process_query(request.query, k=request.num_chunks)
-        end_time = time.time()
-        
-        # Add processing time
-        response["processing_time_ms"] = (end_time - start_time) * 1000
-        
-        return response
+        result, cached = await query_executor.run(answer_query, request)
+    except QueryRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(QUERY_RETRY_AFTER_SECONDS)}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Query timed out after {query_executor.timeout_seconds:g} seconds"
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    end_time = time.time()
+    
+    # Add processing time
+    response = dict(result, query=request.query, cached=cached)
+    response["processing_time_ms"] = (end_time - start_time) * 1000
+    
+    return response
+
+def sse_event(event: Dict[str, Any]) -> str:
+    """Format an event dict from the retriever as a server-sent event"""
+    payload = {name: value for name, value in event.items() if name != "event"}
+    return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+async def stream_events(executor: QueryExecutor, fn, *args, **kwargs) -> StreamingResponse:
+    """
+    Run a retriever generator on an executor and stream its events as server-sent events.
+    
+    Errors before the first event are reported with a status code, later
+    ones as an "error" event.
+    """
+    start_time = time.time()
+    events = executor.stream(fn, *args, **kwargs)
+    
+    try:
+        first_event = await events.__anext__()
+    except QueryRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(QUERY_RETRY_AFTER_SECONDS)}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Query timed out after {executor.timeout_seconds:g} seconds"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    
+    async def body():
+        yield sse_event(first_event)
+        try:
+            async for event in events:
+                if event["event"] == "done":
+                    event["timing"]["response_ms"] = (time.time() - start_time) * 1000
+                yield sse_event(event)
+        except asyncio.TimeoutError:
+            yield sse_event({
+                "event": "error",
+                "detail": f"Query timed out after {executor.timeout_seconds:g} seconds"
+            })
+        except Exception as e:
+            yield sse_event({"event": "error", "detail": f"Error processing query: {str(e)}"})
+        finally:
+            await events.aclose()
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Process a natural language query, streaming the retrieved chunks and then
+    the answer tokens as server-sent events
+    """
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="Retriever not initialized")
+    
+    try:
+        retriever.llm_pool.validate(request.model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await stream_events(
+        query_executor, retriever.stream_query, request.query, k=request.num_chunks, model=request.model,
+        filters=request.filter_dict()
+    )
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest):
+    """
+    Process several natural language queries with shared embedding and search
+    passes, streaming each result as a server-sent event as soon as it is ready
+    """
+    if retriever is None:
+        raise HTTPException(status_code=503, detail="Retriever not initialized")
+    
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="No queries given")
+    if len(request.queries) > QUERY_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {QUERY_BATCH_MAX_QUERIES} queries can be sent in one batch"
+        )
+    try:
+        retriever.llm_pool.validate(request.model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return await stream_events(
+        batch_executor, retriever.process_batch, request.queries, k=request.num_chunks, model=request.model,
+        filters=request.filter_dict(), concurrency=QUERY_BATCH_LLM_CONCURRENCY
+    )
 
 @app.get("/models")
 async def list_models():
-    """List available Ollama models"""
+    """List available Ollama models (and the offline fake model)"""
     try:
         # This is a simplified version - in a real app, you'd query Ollama's API
-        models = ["mistral", "llama2", "llama2:13b", "llama2:70b", "gemma:2b", "gemma:7b"]
-        return {"models": models}
+        return {"models": AVAILABLE_MODELS + [FAKE_MODEL_NAME]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing models: {str(e)}")
 
+@app.get("/metrics")
+async def get_metrics():
+    """Get cache metrics of the query pipeline"""
+    if retriever is None or retriever.embedding_cache is None:
+        raise HTTPException(status_code=503, detail="Retriever not initialized")
+    return {
+        "embedding_cache": retriever.embedding_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "query_executor": query_executor.stats(),
+        "batch_executor": batch_executor.stats(),
+        "llm_pool": retriever.llm_pool.stats()
+    }
+
 @app.get("/stats")
 async def get_stats():
     """Get statistics about the incident data"""
@@ -0,0 +1,130 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+
+DEFAULT_BATCH_SIZE = 256
+
+# Batches in flight per worker; bounds memory held by pending results
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+def create_embedding_model(model_name: str):
+    """
+    Sentence-transformers embedding model producing normalized embeddings.
+    """
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+# Embedding model of a worker process
+_worker_model = None
+
+def _init_worker(model_factory: Callable, model_name: str, threads: int):
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = model_factory(model_name)
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+class ProgressReporter:
+    def __init__(self, total: int, label: str = "chunks", interval_seconds: float = 5.0):
+        """
+        Prints throughput and ETA of a long-running stage at most every interval_seconds.
+
+        Args:
+            total (int): Number of items to process
+            label (str): Name of the items
+            interval_seconds (float): Minimum time between reports
+        """
+        self.total = total
+        self.label = label
+        self.interval_seconds = interval_seconds
+        self.start_time = time.time()
+        self.last_report = 0.0
+        self.done = 0
+
+    def update(self, count: int):
+        self.done += count
+        now = time.time()
+        if now - self.last_report < self.interval_seconds and self.done < self.total:
+            return
+        self.last_report = now
+        elapsed = now - self.start_time
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        print(f"Embedded {self.done}/{self.total} {self.label} "
+              f"({rate:.1f} {self.label}/s, ETA {eta:.0f}s)")
+
+def embed_texts(texts: List[str], model_name: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                num_workers: int = 1, output_path: Optional[str] = None, model=None,
+                model_factory: Callable = create_embedding_model) -> np.ndarray:
+    """
+    Embed texts in batches into one preallocated float32 array.
+
+    With num_workers > 1 the batches are spread over a process pool, each
+    worker loading its own model and using an equal share of the CPU cores.
+    Only a bounded number of batches is in flight at a time, so memory use
+    does not grow with the corpus beyond the output array.
+
+    Args:
+        texts (List[str]): Texts to embed
+        model_name (str): Embedding model name
+        batch_size (int): Texts per batch
+        num_workers (int): Worker processes (1 embeds in this process)
+        output_path (str, optional): Write into a memory-mapped .npy file instead of memory
+        model: Already loaded model used when num_workers is 1
+        model_factory (Callable): Creates a model from its name (must be picklable)
+
+    Returns:
+        np.ndarray: (len(texts), dim) float32 embeddings (a memmap when output_path is set)
+    """
+    batches = [(start, texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+    progress = ProgressReporter(len(texts))
+    output = None
+
+    def store(start: int, embeddings: np.ndarray):
+        nonlocal output
+        if output is None:
+            shape = (len(texts), embeddings.shape[1])
+            if output_path:
+                output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=shape)
+            else:
+                output = np.empty(shape, dtype=np.float32)
+        output[start:start + len(embeddings)] = embeddings
+        progress.update(len(embeddings))
+
+    if num_workers <= 1:
+        model = model or model_factory(model_name)
+        for start, batch in batches:
+            store(start, np.asarray(model.embed_documents(batch), dtype=np.float32))
+    else:
+        threads = max(1, (os.cpu_count() or 1) // num_workers)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(model_factory, model_name, threads)) as pool:
+            pending = deque()
+            for start, batch in batches:
+                pending.append((start, pool.submit(_embed_batch, batch)))
+                if len(pending) >= num_workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                    done_start, future = pending.popleft()
+                    store(done_start, future.result())
+            while pending:
+                done_start, future = pending.popleft()
+                store(done_start, future.result())
+
+    if output is None:
+        output = np.empty((0, 0), dtype=np.float32)
+    elif output_path:
+        output.flush()
+    return output
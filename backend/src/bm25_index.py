@@ -0,0 +1,207 @@
+import os
+import re
+import json
+import numpy as np
+from collections import Counter
+from typing import List, Optional, Tuple
+
+# Directory of the BM25 index inside the vector store
+BM25_DIR = "bm25"
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or the to was were with
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase alphanumeric terms of a text, without stopwords.
+    """
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """
+    LEB128 varint encoding of non-negative integers (7 bits per byte).
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b''
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        nbytes += values >= (np.uint64(1) << np.uint64(shift))
+    starts = np.zeros(len(values), dtype=np.int64)
+    np.cumsum(nbytes[:-1], out=starts[1:])
+    output = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    for byte in range(int(nbytes.max())):
+        present = nbytes > byte
+        chunk = (values[present] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        more = (nbytes[present] > byte + 1).astype(np.uint64) << np.uint64(7)
+        output[starts[present] + byte] = (chunk | more).astype(np.uint8)
+    return output.tobytes()
+
+def decode_varints(data) -> np.ndarray:
+    """
+    Decode a buffer of LEB128 varints into an int64 array.
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    if len(data) == 0:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.empty(len(ends), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, lengths))
+    parts = (data & 0x7F).astype(np.int64) << shifts
+    return np.add.reduceat(parts, starts)
+
+class BM25Index:
+    def __init__(self, index_dir: str):
+        """
+        Read-only BM25 inverted index over chunk texts.
+
+        Documents are chunk positions in the chunk store. Each term's posting
+        list holds delta-encoded positions followed by term frequencies, both
+        as varints, in one memory-mapped blob addressed by an offsets array.
+
+        Args:
+            index_dir (str): Directory written by BM25Index.write
+        """
+        with open(os.path.join(index_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, "terms.json"), 'r') as f:
+            self.terms = {term: term_id for term_id, term in enumerate(json.load(f))}
+        self.document_frequencies = np.load(os.path.join(index_dir, "document_frequencies.npy"))
+        self.posting_offsets = np.load(os.path.join(index_dir, "posting_offsets.npy"), mmap_mode='r')
+        self.document_lengths = np.load(os.path.join(index_dir, "document_lengths.npy"))
+        self.postings = np.load(os.path.join(index_dir, "postings.npy"), mmap_mode='r')
+
+        self.num_documents = len(self.document_lengths)
+        self.average_length = float(self.document_lengths.mean()) if self.num_documents else 0.0
+        df = self.document_frequencies.astype(np.float64)
+        self.idf = np.log(1.0 + (self.num_documents - df + 0.5) / (df + 0.5))
+        self.length_norm = (BM25_K1 * (1 - BM25_B + BM25_B * self.document_lengths /
+                                       max(self.average_length, 1e-9))).astype(np.float64)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.terms
+
+    def postings_for(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Document positions and term frequencies of a term (empty if unknown).
+        """
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        start, end = self.posting_offsets[term_id], self.posting_offsets[term_id + 1]
+        values = decode_varints(self.postings[start:end])
+        count = int(self.document_frequencies[term_id])
+        return np.cumsum(values[:count]), values[count:]
+
+    def scores(self, query: str, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        BM25 score of every document for a query (0 where no term matches).
+
+        Args:
+            query (str): Query text
+            candidates (np.ndarray, optional): Boolean mask of documents allowed to score
+        """
+        scores = np.zeros(self.num_documents, dtype=np.float64)
+        for term, query_count in Counter(tokenize(query)).items():
+            documents, frequencies = self.postings_for(term)
+            if len(documents) == 0:
+                continue
+            if candidates is not None:
+                keep = candidates[documents]
+                documents, frequencies = documents[keep], frequencies[keep]
+            term_id = self.terms[term]
+            weight = self.idf[term_id] * frequencies * (BM25_K1 + 1) / (frequencies + self.length_norm[documents])
+            scores[documents] += query_count * weight
+        return scores
+
+    def search(self, query: str, k: int, candidates: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k documents for a query by BM25 score.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Positions and scores, best first (only matching documents)
+        """
+        scores = self.scores(query, candidates)
+        matching = np.flatnonzero(scores > 0)
+        if len(matching) > k:
+            matching = matching[np.argpartition(-scores[matching], k - 1)[:k]]
+        order = matching[np.lexsort((matching, -scores[matching]))]
+        return order, scores[order]
+
+    @staticmethod
+    def is_current(index_dir: str, source_signature: Optional[Tuple] = None) -> bool:
+        """
+        Whether a complete index exists (and was built from sources with this signature).
+        """
+        meta_path = os.path.join(index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        if source_signature is None:
+            return True
+        with open(meta_path, 'r') as f:
+            stored = json.load(f).get("source_signature")
+        return stored is not None and tuple(map(tuple, stored)) == tuple(source_signature)
+
+    @staticmethod
+    def write(index_dir: str, texts: List[str], source_signature: Optional[Tuple] = None):
+        """
+        Build the inverted index of texts (document i is texts[i]) and save it.
+
+        Args:
+            index_dir (str): Output directory
+            texts (List[str]): Document texts in chunk store order
+            source_signature (Tuple, optional): Signature of the file the texts came from
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        meta_path = os.path.join(index_dir, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        terms = {}
+        term_documents = []
+        term_frequencies = []
+        document_lengths = np.zeros(len(texts), dtype=np.int32)
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            document_lengths[position] = len(tokens)
+            for term, count in Counter(tokens).items():
+                term_id = terms.setdefault(term, len(terms))
+                if term_id == len(term_documents):
+                    term_documents.append([])
+                    term_frequencies.append([])
+                term_documents[term_id].append(position)
+                term_frequencies[term_id].append(count)
+
+        blobs = []
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for term_id, documents in enumerate(term_documents):
+            gaps = np.diff(np.asarray(documents, dtype=np.int64), prepend=0)
+            blob = encode_varints(np.concatenate([gaps, np.asarray(term_frequencies[term_id], dtype=np.int64)]))
+            blobs.append(blob)
+            offsets[term_id + 1] = offsets[term_id] + len(blob)
+
+        postings = np.frombuffer(b''.join(blobs), dtype=np.uint8)
+        np.save(os.path.join(index_dir, "postings.npy"), postings)
+        np.save(os.path.join(index_dir, "posting_offsets.npy"), offsets)
+        np.save(os.path.join(index_dir, "document_frequencies.npy"),
+                np.array([len(documents) for documents in term_documents], dtype=np.int32))
+        np.save(os.path.join(index_dir, "document_lengths.npy"), document_lengths)
+        with open(os.path.join(index_dir, "terms.json"), 'w') as f:
+            json.dump(list(terms), f)
+        with open(meta_path, 'w') as f:
+            json.dump({
+                "num_documents": len(texts),
+                "num_terms": len(terms),
+                "postings_bytes": len(postings),
+                "source_signature": source_signature
+            }, f)
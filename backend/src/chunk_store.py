@@ -0,0 +1,203 @@
+import os
+import json
+import mmap
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+# Directory of the chunk store inside the vector store
+CHUNK_STORE_DIR = "chunk_store"
+
+def _write_atomic(path: str, data: bytes):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def _save_array(path: str, array: np.ndarray):
+    temp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(temp_path, array)
+    os.replace(temp_path, path)
+
+def _map_file(path: str):
+    """
+    Read-only memory map of a file (empty files map to b'').
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+class ChunkStore:
+    def __init__(self, store_dir: str):
+        """
+        Read-only, memory-mapped chunk store.
+
+        Chunk texts live in one UTF-8 blob addressed by an offsets array. Each
+        chunk references its source record by row; records are stored once per
+        row, column by column, as JSON-encoded cells. Pages are shared between
+        processes that open the same store, and only the chunks that are
+        accessed are decoded.
+
+        Args:
+            store_dir (str): Directory written by ChunkStore.write
+        """
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+
+        self.texts = _map_file(os.path.join(store_dir, "texts.bin"))
+        self.text_offsets = np.load(os.path.join(store_dir, "text_offsets.npy"), mmap_mode='r')
+        self.chunk_sources = np.load(os.path.join(store_dir, "chunk_sources.npy"), mmap_mode='r')
+        self.chunk_records = np.load(os.path.join(store_dir, "chunk_records.npy"), mmap_mode='r')
+        self.records = _map_file(os.path.join(store_dir, "records.bin"))
+        self.record_offsets = np.load(os.path.join(store_dir, "record_offsets.npy"), mmap_mode='r')
+
+        # Index ids of the chunks (positions for stores built without ids)
+        ids_path = os.path.join(store_dir, "chunk_ids.npy")
+        if os.path.exists(ids_path):
+            self.chunk_ids = np.load(ids_path, mmap_mode='r')
+        else:
+            self.chunk_ids = np.arange(len(self), dtype=np.int64)
+        self._id_order = None
+
+    def __len__(self):
+        return self.meta["num_chunks"]
+
+    def text(self, position: int) -> str:
+        """
+        Text of one chunk.
+        """
+        start, end = self.text_offsets[position], self.text_offsets[position + 1]
+        return self.texts[start:end].decode('utf-8')
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """
+        Source record of one row (cells missing from the original record are omitted).
+        """
+        record = {}
+        for column, offsets in zip(self.columns, self.record_offsets):
+            start, end = offsets[row], offsets[row + 1]
+            if end > start:
+                record[column] = json.loads(self.records[start:end])
+        return record
+
+    def column(self, column: str) -> List[Any]:
+        """
+        Values of one record column for every record row (None where missing).
+        """
+        rows = self.meta["num_records"]
+        if column not in self.columns:
+            return [None] * rows
+        offsets = self.record_offsets[self.columns.index(column)]
+        return [json.loads(self.records[offsets[row]:offsets[row + 1]]) if offsets[row + 1] > offsets[row] else None
+                for row in range(rows)]
+
+    def positions(self, ids) -> np.ndarray:
+        """
+        Positions of chunks with the given index ids (-1 for unknown ids).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(self.chunk_ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.chunk_ids, kind='stable')
+            self._sorted_ids = np.asarray(self.chunk_ids)[self._id_order]
+        found = np.minimum(np.searchsorted(self._sorted_ids, ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[found] == ids, self._id_order[found], -1)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        """
+        Chunk in the layout of chunks.json ({"text", "metadata": {"source", "record"}}).
+        """
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("chunk position out of range")
+        return {
+            "text": self.text(position),
+            "metadata": {
+                "source": int(self.chunk_sources[position]),
+                "record": self.record(int(self.chunk_records[position]))
+            }
+        }
+
+    @staticmethod
+    def is_current(store_dir: str, source_signature: Optional[Tuple] = None) -> bool:
+        """
+        Whether a complete store exists (and was built from sources with this signature).
+        """
+        meta_path = os.path.join(store_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        if source_signature is None:
+            return True
+        with open(meta_path, 'r') as f:
+            stored = json.load(f).get("source_signature")
+        return stored is not None and tuple(map(tuple, stored)) == tuple(source_signature)
+
+    @staticmethod
+    def write(store_dir: str, chunks: List[Dict[str, Any]], source_signature: Optional[Tuple] = None,
+              ids: Optional[List[int]] = None):
+        """
+        Write chunks (in the layout of chunks.json) as a chunk store.
+
+        Records shared by several chunks of the same source are stored once.
+        meta.json is written last, so a store without it is incomplete.
+
+        Args:
+            store_dir (str): Output directory
+            chunks (List[Dict[str, Any]]): Chunks with "text" and "metadata" {"source", "record"}
+            source_signature (Tuple, optional): Signature of the file the chunks came from
+            ids (List[int], optional): FAISS id of each chunk (positions if None)
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        meta_path = os.path.join(store_dir, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        texts = [chunk["text"].encode('utf-8') for chunk in chunks]
+        text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=text_offsets[1:])
+
+        # One record row per distinct source
+        sources = np.array([chunk["metadata"].get("source", -1) for chunk in chunks], dtype=np.int64)
+        record_rows = {}
+        records = []
+        chunk_records = np.empty(len(chunks), dtype=np.int32)
+        for position, chunk in enumerate(chunks):
+            source = int(sources[position])
+            if source not in record_rows:
+                record_rows[source] = len(records)
+                records.append(chunk["metadata"].get("record", {}))
+            chunk_records[position] = record_rows[source]
+
+        columns = list(dict.fromkeys(column for record in records for column in record))
+        cells = []
+        record_offsets = np.zeros((len(columns), len(records) + 1), dtype=np.int64)
+        size = 0
+        for column_index, column in enumerate(columns):
+            record_offsets[column_index, 0] = size
+            for row, record in enumerate(records):
+                if column in record:
+                    cell = json.dumps(record[column]).encode('utf-8')
+                    cells.append(cell)
+                    size += len(cell)
+                record_offsets[column_index, row + 1] = size
+
+        _write_atomic(os.path.join(store_dir, "texts.bin"), b''.join(texts))
+        _save_array(os.path.join(store_dir, "text_offsets.npy"), text_offsets)
+        _save_array(os.path.join(store_dir, "chunk_sources.npy"), sources)
+        _save_array(os.path.join(store_dir, "chunk_records.npy"), chunk_records)
+        _write_atomic(os.path.join(store_dir, "records.bin"), b''.join(cells))
+        _save_array(os.path.join(store_dir, "record_offsets.npy"), record_offsets)
+        if ids is None:
+            ids = np.arange(len(chunks), dtype=np.int64)
+        _save_array(os.path.join(store_dir, "chunk_ids.npy"), np.asarray(ids, dtype=np.int64))
+        meta = {
+            "num_chunks": len(chunks),
+            "num_records": len(records),
+            "columns": columns,
+            "source_signature": source_signature
+        }
+        _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
@@ -0,0 +1,119 @@
+import re
+import math
+from typing import Dict, Any, List, Optional
+
+# Default token budget of the incident context in a prompt
+DEFAULT_CONTEXT_TOKENS = 1500
+
+# Field values that carry no information
+EMPTY_VALUES = {"", "unknown", "none", "nan", "null", "n/a", "na", "-"}
+
+# Fields left out of the prompt entirely
+DROPPED_FIELDS = {"Information Phone"}
+
+# Fields ignored when comparing chunks for near-duplicates
+VOLATILE_FIELDS = {"Incident ID", "Received Date/Time", "Incident Reported At"}
+
+# Minimum word-trigram Jaccard similarity of near-duplicate chunks
+DUPLICATE_SIMILARITY = 0.85
+
+SEPARATOR = "\n\n"
+
+TOKEN_PIECES = re.compile(r"\d|[^\W\d_]+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast estimate of the number of LLM tokens in a text.
+
+    Approximates a BPE tokenizer: every digit and punctuation mark is one
+    token and words take one token per four characters.
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PIECES.findall(text))
+
+def _fields(text: str) -> List[List[str]]:
+    """
+    Lines of a chunk as [field, value] pairs ([line] for lines that are not fields).
+    """
+    lines = []
+    for line in text.splitlines():
+        key, separator, value = line.partition(":")
+        lines.append([key.strip(), value.strip()] if separator else [line])
+    return lines
+
+def _shingles(lines: List[List[str]]) -> set:
+    words = " ".join(" ".join(line) for line in lines if line[0] not in VOLATILE_FIELDS).lower().split()
+    return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+class ContextBuilder:
+    def __init__(self, max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                 duplicate_similarity: float = DUPLICATE_SIMILARITY):
+        """
+        Builds the incident context of a prompt from ranked chunks.
+
+        Fields without information and dropped fields are removed, near-duplicate
+        chunks are merged into the best-ranked one (keeping their incident ids),
+        and chunks are packed in ranked order until the token budget is used.
+
+        Args:
+            max_tokens (int): Token budget of the context
+            duplicate_similarity (float): Word-trigram Jaccard similarity above
+                which two chunks are near-duplicates
+        """
+        self.max_tokens = max_tokens
+        self.duplicate_similarity = duplicate_similarity
+
+    def build(self, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Context text for chunks in ranked order.
+
+        Args:
+            chunks (List[Dict[str, Any]]): Retrieved chunks, best first
+
+        Returns:
+            Dict[str, Any]: "text" of the context, its estimated "tokens", and the
+            number of chunks "used", merged as "duplicates" and left out "over_budget"
+        """
+        kept = []
+        duplicates = 0
+        for chunk in chunks:
+            lines = [line for line in _fields(chunk["text"])
+                     if not (len(line) == 2 and (line[0] in DROPPED_FIELDS or line[1].lower() in EMPTY_VALUES))]
+            shingles = _shingles(lines)
+            incident_id = next((line[1] for line in lines if line[0] == "Incident ID"), None)
+
+            original = None
+            for candidate in kept:
+                overlap = len(shingles & candidate["shingles"]) / max(1, len(shingles | candidate["shingles"]))
+                if overlap >= self.duplicate_similarity:
+                    original = candidate
+                    break
+            if original is None:
+                kept.append({"lines": lines, "shingles": shingles, "id": incident_id, "similar": []})
+            else:
+                duplicates += 1
+                if incident_id and incident_id != original["id"] and incident_id not in original["similar"]:
+                    original["similar"].append(incident_id)
+
+        texts = []
+        tokens = 0
+        separator_tokens = estimate_tokens(SEPARATOR)
+        over_budget = 0
+        for entry in kept:
+            lines = [": ".join(line) for line in entry["lines"]]
+            if entry["similar"]:
+                lines.append(f"Similar Incident IDs: {', '.join(entry['similar'])}")
+            text = "\n".join(lines)
+            cost = estimate_tokens(text) + (separator_tokens if texts else 0)
+            if tokens + cost > self.max_tokens:
+                over_budget += 1
+                continue
+            texts.append(text)
+            tokens += cost
+
+        return {
+            "text": SEPARATOR.join(texts),
+            "tokens": tokens,
+            "used": len(texts),
+            "duplicates": duplicates,
+            "over_budget": over_budget
+        }
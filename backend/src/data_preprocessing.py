@@ -1,7 +1,50 @@
 import pandas as pd
+import numpy as np
 import os
+import re
 import json
 from datetime import datetime
+from typing import Dict, Any, Tuple
+from geocoding import Geocoder
+
+# Duration strings like "0h 1m 35s"
+DURATION_PATTERN = re.compile(r'^\s*(\d+)\s*h\s+(\d+)\s*m\s+(\d+)\s*s\s*$')
+
+def parse_durations(values: pd.Series) -> Tuple[pd.Series, Dict[str, Any]]:
+    """
+    Parse a column of duration strings like "0h 1m 35s" into float minutes.
+
+    Each distinct string is matched once against DURATION_PATTERN and the result
+    is broadcast back to the rows. Malformed values become NaN and are counted in
+    the report instead of raising.
+
+    Args:
+        values (pd.Series): Duration strings (missing values are allowed)
+
+    Returns:
+        Tuple[pd.Series, Dict[str, Any]]: Minutes per row and a parse report
+    """
+    codes, uniques = pd.factorize(values)
+    unique_minutes = np.full(len(uniques), np.nan)
+    if len(uniques):
+        parts = pd.Series(uniques, dtype=object).astype(str).str.extract(DURATION_PATTERN)
+        hours, minutes, seconds = (parts[i].astype(float).to_numpy() for i in range(3))
+        unique_minutes = hours * 60 + minutes + seconds / 60
+
+    present = codes >= 0
+    result = np.full(len(values), np.nan)
+    result[present] = unique_minutes[codes[present]]
+
+    malformed_uniques = np.isnan(unique_minutes)
+    malformed = int(malformed_uniques[codes[present]].sum())
+    report = {
+        'total': int(len(values)),
+        'missing': int((~present).sum()),
+        'parsed': int(present.sum()) - malformed,
+        'malformed': malformed,
+        'malformed_examples': [str(value) for value in np.asarray(uniques, dtype=object)[malformed_uniques][:5]]
+    }
+    return pd.Series(result, index=values.index, name=values.name), report
 
 class DataPreprocessor:
     def __init__(self, excel_path=None, csv_path=None):
@@ -15,6 +58,7 @@ class DataPreprocessor:
         self.excel_path = excel_path
         self.csv_path = csv_path
         self.data = None
+        self.parse_report = {}
         
     def load_data(self):
         """
@@ -57,8 +101,20 @@ class DataPreprocessor:
             if col in df.columns:
                 df[col] = df[col].fillna('Unknown')
         
+        # Parse duration strings into minutes (the raw strings are kept for the text)
+        duration_columns = {
+            'time_taken_to_take_action': 'action_time_minutes',
+            'time_taken_to_close': 'close_time_minutes'
+        }
+        for col, minutes_col in duration_columns.items():
+            if col in df.columns:
+                df[minutes_col], self.parse_report[col] = parse_durations(df[col])
+                if self.parse_report[col]['malformed']:
+                    print(f"{self.parse_report[col]['malformed']} malformed values in {col} set to NaN")
+        
         # Convert date columns to datetime if they exist
-        date_columns = [col for col in df.columns if 'date' in col or 'time' in col or col in ['received_date_time', 'incident_reported_at', 'action_date_time', 'closed_at']]
+        date_columns = [col for col in df.columns if ('date' in col or 'time' in col or col in ['received_date_time', 'incident_reported_at', 'action_date_time', 'closed_at'])
+                        and col not in duration_columns and not col.endswith('_minutes')]
         for col in date_columns:
             if col in df.columns:
                 try:
@@ -103,6 +159,40 @@ class DataPreprocessor:
         print(f"Data cleaned. Shape: {df.shape}")
         return df
     
+    def geocode_locations(self, gazetteer_path, cache_path):
+        """
+        Add latitude, longitude and geocode_precision columns by resolving each
+        location/taluk pair against a local gazetteer.
+        
+        Resolved pairs are kept in a persistent cache, so each distinct location
+        is only looked up once across pipeline runs.
+        
+        Args:
+            gazetteer_path (str): Path to the gazetteer CSV
+            cache_path (str): Path to the SQLite geocode cache
+            
+        Returns:
+            pd.DataFrame: Data with the coordinate columns added
+        """
+        if self.data is None:
+            self.clean_data()
+        if 'location' not in self.data.columns or 'taluk' not in self.data.columns:
+            print("No location/taluk columns to geocode")
+            return self.data
+            
+        geocoder = Geocoder(gazetteer_path, cache_path)
+        try:
+            coords = geocoder.geocode(self.data['location'], self.data['taluk'])
+        finally:
+            geocoder.close()
+        for col in coords.columns:
+            self.data[col] = coords[col]
+            
+        stats = geocoder.stats
+        print(f"Geocoded {stats['distinct']} distinct locations "
+              f"({stats['cache_hits']} from cache, {stats['unresolved']} unresolved)")
+        return self.data
+    
     def save_processed_data(self, output_path):
         """
         Save the processed data to a CSV file.
@@ -147,6 +237,7 @@ class DataPreprocessor:
             "total_records": len(self.data),
             "columns": list(self.data.columns),
             "missing_values": self.data.isnull().sum().to_dict(),
+            "duration_parse_report": self.parse_report,
         }
         
         # Get incident type distribution if it exists
@@ -0,0 +1,160 @@
+import os
+import time
+import sqlite3
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Default maximum number of embeddings kept in the SQLite tier
+DEFAULT_DISK_MAX_ENTRIES = 100000
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text for cache lookups (case and whitespace insensitive).
+
+    Args:
+        query (str): Raw query text
+
+    Returns:
+        str: Normalized query
+    """
+    return ' '.join(query.lower().split())
+
+class QueryEmbeddingCache:
+    def __init__(self, model_name: str, max_entries: int = 1024, disk_path: Optional[str] = None,
+                 disk_max_entries: int = DEFAULT_DISK_MAX_ENTRIES):
+        """
+        LRU cache of query embeddings with an optional SQLite tier that survives restarts.
+
+        Entries are keyed by the normalized query text and the embedding model name.
+        The SQLite tier records when each entry was last used and drops the least
+        recently used entries (of any model) once it holds more than disk_max_entries.
+
+        Args:
+            model_name (str): Name of the embedding model the vectors come from
+            max_entries (int): Maximum number of embeddings kept in memory
+            disk_path (str, optional): Path to the SQLite file for the on-disk tier
+            disk_max_entries (int): Maximum number of embeddings kept on disk
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.connection = None
+        self._disk_entries = 0
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self.connection = sqlite3.connect(disk_path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(model TEXT, query TEXT, embedding BLOB, last_used REAL DEFAULT 0, PRIMARY KEY (model, query))"
+            )
+            # Files written before the tier was capped have no last_used column
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(query_embeddings)")]
+            if "last_used" not in columns:
+                self.connection.execute("ALTER TABLE query_embeddings ADD COLUMN last_used REAL DEFAULT 0")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS query_embeddings_last_used ON query_embeddings (last_used)"
+            )
+            self._disk_entries = self.connection.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            self._prune()
+            self.connection.commit()
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune(self):
+        # Drop the least recently used disk entries beyond disk_max_entries
+        excess = self._disk_entries - self.disk_max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM query_embeddings WHERE rowid IN "
+                "(SELECT rowid FROM query_embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self._disk_entries -= excess
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Cached embedding for a query, from memory or disk (None on a miss).
+        """
+        key = normalize_query(query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+            if self.connection is not None:
+                row = self.connection.execute(
+                    "SELECT embedding FROM query_embeddings WHERE model = ? AND query = ?",
+                    (self.model_name, key)
+                ).fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        "UPDATE query_embeddings SET last_used = ? WHERE model = ? AND query = ?",
+                        (time.time(), self.model_name, key)
+                    )
+                    self.connection.commit()
+                    embedding = np.frombuffer(row[0], dtype=np.float32)
+                    self._remember(key, embedding)
+                    self.disk_hits += 1
+                    return embedding
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, embedding) -> np.ndarray:
+        """
+        Store the embedding of a query in memory (and on disk if enabled).
+
+        Returns:
+            np.ndarray: The embedding as a read-only float32 array
+        """
+        key = normalize_query(query)
+        embedding = np.asarray(embedding, dtype=np.float32).copy()
+        embedding.flags.writeable = False
+        with self._lock:
+            self._remember(key, embedding)
+            if self.connection is not None:
+                updated = self.connection.execute(
+                    "UPDATE query_embeddings SET embedding = ?, last_used = ? WHERE model = ? AND query = ?",
+                    (embedding.tobytes(), time.time(), self.model_name, key)
+                ).rowcount
+                if not updated:
+                    self.connection.execute(
+                        "INSERT INTO query_embeddings VALUES (?, ?, ?, ?)",
+                        (self.model_name, key, embedding.tobytes(), time.time())
+                    )
+                    self._disk_entries += 1
+                    self._prune()
+                self.connection.commit()
+        return embedding
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters and size of the cache.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'model': self.model_name,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'disk_tier': self.connection is not None,
+            'disk_entries': self._disk_entries,
+            'disk_max_entries': self.disk_max_entries
+        }
@@ -0,0 +1,43 @@
+import re
+import time
+from typing import Any, Iterator, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+# Model name that selects the fake LLM instead of Ollama
+FAKE_MODEL_NAME = "fake"
+
+class FakeTokenLLM(LLM):
+    """
+    Offline stand-in for Ollama that streams a deterministic answer word by word.
+
+    The answer repeats the user question and counts the incident records in the
+    prompt, so responses can be checked without a running model.
+    """
+    token_delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-token"
+
+    def _tokens(self, prompt: str) -> List[str]:
+        match = re.search(r'USER QUESTION:\s*(.*)', prompt)
+        question = match.group(1).strip() if match else prompt.strip()
+        records = len(re.findall(r'^\s*Incident ID:', prompt, flags=re.MULTILINE))
+        answer = f"Offline answer to '{question}' based on {records} incident records."
+        return re.findall(r'\S+\s*', answer)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        for token in self._tokens(prompt):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            chunk = GenerationChunk(text=token)
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
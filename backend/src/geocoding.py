@@ -0,0 +1,218 @@
+import os
+import re
+import csv
+import sqlite3
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Location strings that already are "lat lng" or "lat, lng" pairs
+COORDINATE_PATTERN = re.compile(r'^\s*(-?\d{1,2}\.\d+)[\s,]+(-?\d{1,3}\.\d+)\s*$')
+
+# Number of keys per SQL statement when reading the cache
+CACHE_READ_BATCH = 500
+
+# How precisely a location was resolved
+PRECISION_COORDINATES = 'coordinates'
+PRECISION_PLACE = 'place'
+PRECISION_TALUK = 'taluk'
+
+def normalize_location(value) -> str:
+    """
+    Normalize a location string for lookup: lowercase, punctuation removed,
+    whitespace collapsed.
+
+    Args:
+        value: Location value (missing values normalize to '')
+
+    Returns:
+        str: Normalized location
+    """
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ''
+    text = re.sub(r'[^a-z0-9]+', ' ', str(value).lower())
+    return ' '.join(text.split())
+
+def cache_key(location, taluk) -> str:
+    """
+    Cache key for a location within a taluk. Coordinate literals keep their raw
+    text; other locations are normalized.
+    """
+    location = str(location).strip()
+    if not COORDINATE_PATTERN.match(location):
+        location = normalize_location(location)
+    return location + '|' + normalize_location(taluk)
+
+class Gazetteer:
+    def __init__(self, gazetteer_path: str):
+        """
+        Local place-name gazetteer (CSV with name, kind, latitude, longitude).
+
+        Rows with kind 'taluk' are used as the fallback for their taluk.
+
+        Args:
+            gazetteer_path (str): Path to the gazetteer CSV
+        """
+        self.places = {}
+        self.taluks = {}
+        with open(gazetteer_path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                name = normalize_location(row['name'])
+                coords = (float(row['latitude']), float(row['longitude']))
+                if row.get('kind') == 'taluk':
+                    self.taluks[name] = coords
+                self.places.setdefault(name, coords)
+        self.max_words = max((len(name.split()) for name in self.places), default=0)
+
+        with open(gazetteer_path, 'rb') as f:
+            self.digest = hashlib.sha1(f.read()).hexdigest()
+
+    def lookup(self, location: str, taluk: str) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+        """
+        Resolve a location within a taluk.
+
+        Tries a coordinate literal, then the longest gazetteer name contained in
+        the normalized location, then the taluk itself.
+
+        Args:
+            location (str): Raw location string
+            taluk (str): Raw taluk name
+
+        Returns:
+            Tuple: (latitude, longitude, precision), all None if unresolved
+        """
+        match = COORDINATE_PATTERN.match(str(location)) if location is not None else None
+        if match:
+            return float(match.group(1)), float(match.group(2)), PRECISION_COORDINATES
+
+        words = normalize_location(location).split()
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                coords = self.places.get(' '.join(words[start:start + size]))
+                if coords is not None:
+                    return coords[0], coords[1], PRECISION_PLACE
+
+        coords = self.taluks.get(normalize_location(taluk))
+        if coords is not None:
+            return coords[0], coords[1], PRECISION_TALUK
+        return None, None, None
+
+class GeocodeCache:
+    def __init__(self, cache_path: str, gazetteer_digest: str):
+        """
+        Persistent key-value cache of resolved locations in SQLite.
+
+        Entries resolved against a different gazetteer file are discarded.
+
+        Args:
+            cache_path (str): Path to the SQLite file
+            gazetteer_digest (str): Content hash of the gazetteer in use
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS geocodes (key TEXT PRIMARY KEY, latitude REAL, longitude REAL, precision TEXT)"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'gazetteer'").fetchone()
+        if row is None or row[0] != gazetteer_digest:
+            with self.connection:
+                self.connection.execute("DELETE FROM geocodes")
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('gazetteer', ?)", (gazetteer_digest,))
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple]:
+        """
+        Look up many keys at once.
+
+        Returns:
+            Dict[str, Tuple]: (latitude, longitude, precision) for the keys that are cached
+        """
+        found = {}
+        for start in range(0, len(keys), CACHE_READ_BATCH):
+            batch = keys[start:start + CACHE_READ_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            for key, latitude, longitude, precision in self.connection.execute(
+                f"SELECT key, latitude, longitude, precision FROM geocodes WHERE key IN ({placeholders})", batch
+            ):
+                found[key] = (latitude, longitude, precision)
+        return found
+
+    def put_many(self, entries: Dict[str, Tuple]):
+        """
+        Store many resolved keys in a single transaction.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)",
+                [(key,) + tuple(value) for key, value in entries.items()]
+            )
+
+    def close(self):
+        self.connection.close()
+
+class Geocoder:
+    def __init__(self, gazetteer_path: str, cache_path: str):
+        """
+        Resolve incident Location/Taluk strings to coordinates, once per distinct pair.
+
+        Args:
+            gazetteer_path (str): Path to the gazetteer CSV
+            cache_path (str): Path to the persistent SQLite cache
+        """
+        self.gazetteer = Gazetteer(gazetteer_path)
+        self.cache = GeocodeCache(cache_path, self.gazetteer.digest)
+        self.stats = {'distinct': 0, 'cache_hits': 0, 'resolved': 0, 'unresolved': 0}
+
+    def geocode(self, locations: pd.Series, taluks: pd.Series) -> pd.DataFrame:
+        """
+        Geocode a column of locations with their taluks.
+
+        Only distinct (normalized location, taluk) pairs missing from the cache
+        are looked up in the gazetteer; results are written back to the cache.
+
+        Args:
+            locations (pd.Series): Location strings
+            taluks (pd.Series): Taluk names
+
+        Returns:
+            pd.DataFrame: latitude, longitude and geocode_precision per row
+        """
+        # Normalize and resolve each distinct raw pair only once
+        pairs = pd.MultiIndex.from_arrays([
+            locations.fillna('').astype(str).to_numpy(), taluks.fillna('').astype(str).to_numpy()
+        ])
+        codes, unique_pairs = pairs.factorize()
+        keys = [cache_key(location, taluk) for location, taluk in unique_pairs]
+        distinct = list(dict.fromkeys(keys))
+
+        cached = self.cache.get_many(distinct)
+        missing = {}
+        for key in distinct:
+            if key not in cached:
+                location, taluk = key.rsplit('|', 1)
+                missing[key] = self.gazetteer.lookup(location, taluk)
+        if missing:
+            self.cache.put_many(missing)
+        resolved = {**cached, **missing}
+
+        values = [resolved[key] for key in keys]
+        unique_latitudes = np.array([np.nan if v[0] is None else v[0] for v in values], dtype=float)
+        unique_longitudes = np.array([np.nan if v[1] is None else v[1] for v in values], dtype=float)
+        unique_precisions = np.array([v[2] for v in values] + [None], dtype=object)[:-1]
+
+        self.stats = {
+            'distinct': len(distinct),
+            'cache_hits': len(cached),
+            'resolved': sum(resolved[key][2] is not None for key in distinct),
+            'unresolved': sum(resolved[key][2] is None for key in distinct)
+        }
+
+        return pd.DataFrame({
+            'latitude': unique_latitudes[codes],
+            'longitude': unique_longitudes[codes],
+            'geocode_precision': unique_precisions[codes]
+        }, index=locations.index)
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,184 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Callable
+
+# Zoom levels accepted for simplification (Leaflet tile zooms)
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+
+# Simplification tolerance in screen pixels at the requested zoom
+TOLERANCE_PIXELS = 1.0
+
+def zoom_tolerance(zoom: int) -> float:
+    """
+    Douglas-Peucker tolerance in degrees for a web-mercator zoom level.
+
+    Args:
+        zoom (int): Zoom level
+
+    Returns:
+        float: Tolerance in degrees (size of TOLERANCE_PIXELS at that zoom)
+    """
+    return TOLERANCE_PIXELS * 360.0 / (256 * 2 ** zoom)
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Simplify a polyline with the Douglas-Peucker algorithm.
+
+    Args:
+        points (np.ndarray): (n, 2) array of coordinates
+        tolerance (float): Maximum allowed distance from the original line
+
+    Returns:
+        np.ndarray: Simplified (m, 2) array (first and last points are kept)
+    """
+    if len(points) <= 2:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+def simplify_ring(ring: List[List[float]], tolerance: float) -> List[List[float]]:
+    """
+    Simplify a closed polygon ring, keeping it valid (at least 4 positions).
+
+    Rings that would collapse are simplified again with a smaller tolerance.
+    """
+    points = np.asarray(ring, dtype=float)
+    if len(points) <= 4:
+        return ring
+    simplified = douglas_peucker(points, tolerance)
+    while len(simplified) < 4 and tolerance > 0:
+        tolerance /= 2
+        simplified = douglas_peucker(points, tolerance)
+    return simplified.tolist()
+
+def simplify_geometry(geometry: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """
+    Simplify a Polygon or MultiPolygon geometry (other types are returned as is).
+    """
+    if geometry['type'] == 'Polygon':
+        coordinates = [simplify_ring(ring, tolerance) for ring in geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        coordinates = [[simplify_ring(ring, tolerance) for ring in polygon] for polygon in geometry['coordinates']]
+    else:
+        return geometry
+    return {'type': geometry['type'], 'coordinates': coordinates}
+
+class CachedBody:
+    def __init__(self, body: bytes):
+        """
+        Serialized response body with its gzip encoding and strong ETags.
+
+        Args:
+            body (bytes): Uncompressed JSON body
+        """
+        self.body = body
+        self.gzipped = gzip.compress(body)
+        digest = hashlib.sha1(body).hexdigest()
+        self.etag = digest
+        # A different representation needs its own strong validator
+        self.gzip_etag = f"{digest}-gz"
+
+class TalukGeoJSONCache:
+    def __init__(self, geojson_path: str, counts_source: Callable[[], Dict[str, int]],
+                 version_source: Callable[[], int]):
+        """
+        Taluk boundaries loaded once from disk, merged with live incident counts
+        and kept serialized (plain and gzip) per zoom level.
+
+        Args:
+            geojson_path (str): Path to the taluk FeatureCollection
+            counts_source (Callable): Returns the incident count per taluk name
+            version_source (Callable): Returns a number that changes whenever the counts change
+        """
+        with open(geojson_path, 'r') as f:
+            self.geojson = json.load(f)
+        print(f"Loaded {len(self.geojson['features'])} taluk boundaries from {geojson_path}")
+
+        self.counts_source = counts_source
+        self.version_source = version_source
+        self._version = None
+        self._bodies = {}
+        self._simplified = {}
+        self._lock = threading.Lock()
+
+    def _geometries(self, zoom: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Feature geometries at a zoom level (simplified once per level).
+        """
+        if zoom is None:
+            return [feature['geometry'] for feature in self.geojson['features']]
+        if zoom not in self._simplified:
+            tolerance = zoom_tolerance(zoom)
+            self._simplified[zoom] = [
+                simplify_geometry(feature['geometry'], tolerance) for feature in self.geojson['features']
+            ]
+        return self._simplified[zoom]
+
+    def _serialize(self, zoom: Optional[int]) -> CachedBody:
+        counts = self.counts_source()
+        features = []
+        for feature, geometry in zip(self.geojson['features'], self._geometries(zoom)):
+            properties = dict(feature.get('properties', {}))
+            properties['incidentCount'] = int(counts.get(properties.get('name'), 0))
+            features.append({'type': 'Feature', 'properties': properties, 'geometry': geometry})
+        geojson = {'type': 'FeatureCollection', 'features': features}
+        return CachedBody(json.dumps(geojson, separators=(',', ':')).encode('utf-8'))
+
+    def get(self, zoom: Optional[int] = None) -> CachedBody:
+        """
+        Serialized FeatureCollection for a zoom level (None for full detail).
+
+        Cached bodies are dropped only when the incident counts change.
+
+        Args:
+            zoom (int, optional): Zoom level, clamped to [MIN_ZOOM, MAX_ZOOM]
+
+        Returns:
+            CachedBody: Plain and gzip bodies with their ETags
+        """
+        if zoom is not None:
+            zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        with self._lock:
+            version = self.version_source()
+            if version != self._version:
+                self._bodies = {}
+                self._version = version
+            if zoom not in self._bodies:
+                self._bodies[zoom] = self._serialize(zoom)
+            return self._bodies[zoom]
+
+# Example usage
+if __name__ == "__main__":
+    # Get the directory of the current script
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    geojson_path = os.path.join(os.path.dirname(current_dir), "mangalore_taluks.geojson")
+
+    cache = TalukGeoJSONCache(geojson_path, lambda: {}, lambda: 0)
+    for zoom in [None, 8, 12]:
+        body = cache.get(zoom)
+        print(f"zoom={zoom}: {len(body.body)} bytes ({len(body.gzipped)} gzipped), ETag {body.etag}")
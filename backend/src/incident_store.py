@@ -0,0 +1,842 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional
+from data_preprocessing import parse_durations
+
+# Unique, ordered incident id used as the keyset pagination cursor
+ID_COLUMN = 'Sl. No.'
+
+# Columns that are dictionary-encoded into int32 codes
+CATEGORICAL_COLUMNS = ['Incident Type', 'Taluk', 'Info_Source', 'Closed By Officer']
+
+# Columns that are stored as int64 nanoseconds since the epoch
+DATE_COLUMNS = ['Received Date/Time', 'Incident Reported at', 'Action Date/Time', 'Closed At']
+
+# Derived duration columns (float minutes)
+DURATION_COLUMNS = {
+    'Time taken to take Action': 'Action Time Minutes',
+    'Time taken to Close': 'Close Time Minutes'
+}
+
+# Sentinel used for missing timestamps in the int64 columns
+NAT = np.iinfo(np.int64).min
+
+NS_PER_HOUR = 3600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+MONSOON_MONTHS = [6, 7, 8, 9]
+
+# Reporting channels derived from Info_Source (index = channel code)
+CHANNELS = ['Phone', 'App/Web', 'Official', 'Other']
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# SLA thresholds used by the KPI summary
+ACTION_SLA_HOURS = 24
+CLOSURE_SLA_HOURS = 48
+
+def load_incident_frame(csv_path: str) -> pd.DataFrame:
+    """
+    Load the raw incident CSV and convert date and duration columns.
+
+    Args:
+        csv_path (str): Path to the incident CSV (e.g. modified_dataset.csv)
+
+    Returns:
+        pd.DataFrame: Incident DataFrame with parsed dates and duration minutes
+        (the duration parse report is kept in df.attrs['parse_report'])
+    """
+    df = pd.read_csv(csv_path)
+
+    # Convert date columns to datetime
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    # Convert time duration columns to minutes for easier calculations
+    parse_report = {}
+    for source_col, minutes_col in DURATION_COLUMNS.items():
+        if source_col in df.columns:
+            df[minutes_col], parse_report[source_col] = parse_durations(df[source_col])
+            if parse_report[source_col]['malformed']:
+                print(f"{parse_report[source_col]['malformed']} malformed values in '{source_col}' set to NaN")
+    df.attrs['parse_report'] = parse_report
+
+    return df
+
+class CategoricalColumn:
+    def __init__(self, values: pd.Series):
+        """
+        Dictionary-encode a column into int32 codes (-1 for missing values).
+
+        Args:
+            values (pd.Series): Column values
+        """
+        codes, uniques = pd.factorize(values)
+        self.codes = codes.astype(np.int32)
+        self.categories = [str(value) for value in uniques]
+
+    def __len__(self):
+        return len(self.categories)
+
+class GroupAggregate:
+    def __init__(self, keys: List[Any], codes: np.ndarray, measures: Dict[str, np.ndarray]):
+        """
+        Count and sum/mean aggregates of measures grouped by integer codes.
+
+        Args:
+            keys (List[Any]): Group key for each code
+            codes (np.ndarray): Group code per row (-1 rows are ignored)
+            measures (Dict[str, np.ndarray]): Float measures per row (NaN is ignored)
+        """
+        self.keys = keys
+        size = len(keys)
+        mask = codes >= 0
+        group_codes = codes[mask]
+        self.counts = np.bincount(group_codes, minlength=size)
+        self.sums = {}
+        self.valid = {}
+        for name, values in measures.items():
+            values = values[mask]
+            present = ~np.isnan(values)
+            self.sums[name] = np.bincount(group_codes[present], weights=values[present], minlength=size)
+            self.valid[name] = np.bincount(group_codes[present], minlength=size)
+
+    def mean(self, name: str) -> np.ndarray:
+        """
+        Mean of a measure per group (NaN for groups without values).
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums[name] / self.valid[name]
+
+    def ranked(self, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Group codes with a non-zero count, ordered by count descending.
+        """
+        order = np.argsort(-self.counts, kind='stable')
+        order = order[self.counts[order] > 0]
+        return order[:limit] if limit is not None else order
+
+def _to_int64(values: pd.Series) -> np.ndarray:
+    """
+    Convert a datetime column to int64 nanoseconds since the epoch (NAT for missing).
+    """
+    return values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+def json_columns(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Convert each column of a DataFrame into an object array of JSON-ready values.
+
+    Datetimes become ISO strings, NumPy scalars become Python values and missing
+    values become None; each column is converted in one pass.
+
+    Args:
+        frame (pd.DataFrame): Frame to convert
+
+    Returns:
+        Dict[str, np.ndarray]: Object array per column
+    """
+    columns = {}
+    for col in frame.columns:
+        series = frame[col]
+        missing = series.isna().to_numpy()
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = np.datetime_as_string(series.to_numpy(dtype='datetime64[s]'), unit='s').astype(object)
+        else:
+            values = np.empty(len(series), dtype=object)
+            values[:] = series.tolist()
+        values[missing] = None
+        columns[col] = values
+    return columns
+
+def _to_float(value) -> float:
+    return float(value) if not np.isnan(value) else 0.0
+
+def classify_channels(sources: pd.Series) -> np.ndarray:
+    """
+    Vectorized mapping of Info_Source values to reporting channel codes.
+
+    Args:
+        sources (pd.Series): Info_Source values
+
+    Returns:
+        np.ndarray: int8 index into CHANNELS for each value
+    """
+    lowered = sources.astype(object).where(sources.notna(), '').astype(str).str.lower()
+    conditions = [
+        lowered.str.contains('phone', regex=False) | lowered.str.contains(r'\d'),
+        lowered.str.contains('app|web|online'),
+        lowered.str.contains('pdo|officer|official')
+    ]
+    codes = np.select([c.to_numpy(dtype=bool) for c in conditions], [0, 1, 2], default=len(CHANNELS) - 1)
+    return codes.astype(np.int8)
+
+class FeatureFrame:
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        """
+        Immutable set of derived per-row feature columns.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Feature arrays (all of the same length)
+        """
+        for values in columns.values():
+            values.flags.writeable = False
+        self._columns = MappingProxyType(dict(columns))
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._columns[name]
+
+    def __len__(self):
+        return len(next(iter(self._columns.values()), []))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        Copy the features into a (mutable) DataFrame.
+        """
+        return pd.DataFrame({name: values.copy() for name, values in self._columns.items()})
+
+def build_feature_frame(reported: np.ndarray, sources: Optional[CategoricalColumn] = None) -> FeatureFrame:
+    """
+    Derive calendar and channel features once from the typed columns.
+
+    Missing timestamps are encoded as -1 (0 for month) in the calendar features.
+
+    Args:
+        reported (np.ndarray): 'Incident Reported at' as int64 nanoseconds
+        sources (CategoricalColumn, optional): Dictionary-encoded Info_Source
+
+    Returns:
+        FeatureFrame: Read-only feature columns
+    """
+    num_rows = len(reported)
+    present = reported != NAT
+
+    day = np.full(num_rows, -1, dtype=np.int64)
+    day[present] = reported[present] // NS_PER_DAY
+    hour = np.full(num_rows, -1, dtype=np.int8)
+    hour[present] = (reported[present] % NS_PER_DAY) // NS_PER_HOUR
+    # 1970-01-01 was a Thursday (Monday = 0)
+    day_of_week = np.full(num_rows, -1, dtype=np.int8)
+    day_of_week[present] = (day[present] + 3) % 7
+
+    # Decompose each distinct day once and broadcast back to the rows
+    year = np.full(num_rows, -1, dtype=np.int16)
+    month = np.zeros(num_rows, dtype=np.int8)
+    iso_year = np.full(num_rows, -1, dtype=np.int16)
+    iso_week = np.full(num_rows, -1, dtype=np.int8)
+    unique_days, inverse = np.unique(day[present], return_inverse=True)
+    if len(unique_days):
+        calendar = pd.DatetimeIndex(unique_days.astype('datetime64[D]').astype('datetime64[ns]'))
+        iso = calendar.isocalendar()
+        year[present] = calendar.year.to_numpy()[inverse]
+        month[present] = calendar.month.to_numpy()[inverse]
+        iso_year[present] = iso['year'].to_numpy(dtype=np.int16)[inverse]
+        iso_week[present] = iso['week'].to_numpy(dtype=np.int8)[inverse]
+
+    # Channels are classified per distinct source and gathered through the codes
+    channel = np.full(num_rows, len(CHANNELS) - 1, dtype=np.int8)
+    if sources is not None and len(sources):
+        category_channels = classify_channels(pd.Series(sources.categories, dtype=object))
+        has_source = sources.codes >= 0
+        channel[has_source] = category_channels[sources.codes[has_source]]
+
+    return FeatureFrame({
+        'day': day,
+        'year': year,
+        'month': month,
+        'iso_year': iso_year,
+        'iso_week': iso_week,
+        'is_monsoon': np.isin(month, MONSOON_MONTHS),
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'channel': channel
+    })
+
+def _encode_values(values: np.ndarray, missing: int = -1):
+    """
+    Encode integer values into sorted unique keys and per-row codes (-1 for missing).
+    """
+    present = values != missing
+    keys, inverse = np.unique(values[present], return_inverse=True)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[present] = inverse
+    return keys, codes
+
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersect two sorted, unique row-id arrays in O(small * log(large)).
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    idx = np.searchsorted(b, a)
+    idx[idx == len(b)] = 0
+    return a[b[idx] == a]
+
+class PostingIndex:
+    def __init__(self, keys: List[Any], codes: np.ndarray):
+        """
+        Secondary index mapping each key to the sorted int32 row ids that carry it.
+
+        Args:
+            keys (List[Any]): Key for each code
+            codes (np.ndarray): Code per row (-1 rows are not indexed)
+        """
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+        num_missing = int((codes < 0).sum())
+        self.rows = order[num_missing:]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.lookup = {key: code for code, key in enumerate(keys)}
+
+    def get(self, key) -> np.ndarray:
+        """
+        Sorted row ids for a key (empty if the key is unknown).
+        """
+        code = self.lookup.get(key)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+class TalukStatsTable:
+    def __init__(self):
+        """
+        Per-taluk statistics (totals, resolution, response time, type breakdown
+        and monthly trend) kept as running accumulators with pre-serialized payloads.
+        """
+        self._entries = {}
+        self._payloads = {}
+        self._serialized = {}
+        # Incremented whenever the counts change (used for cache invalidation)
+        self.version = 0
+
+    def add_incidents(self, frame: pd.DataFrame):
+        """
+        Fold a batch of incidents into the table, rebuilding only the touched taluks.
+
+        Args:
+            frame (pd.DataFrame): Incidents as returned by load_incident_frame
+        """
+        if 'Taluk' not in frame.columns or frame.empty:
+            return
+
+        def column(name, default):
+            return frame[name] if name in frame.columns else pd.Series(default, index=frame.index)
+
+        reported = pd.to_datetime(column('Incident Reported at', pd.NaT), errors='coerce')
+        batch = pd.DataFrame({
+            'taluk': frame['Taluk'],
+            'type': column('Incident Type', None),
+            'month': reported.dt.month,
+            'closed': column('Closed At', None).notna(),
+            'action': column('Action Time Minutes', np.nan).astype(float)
+        }).dropna(subset=['taluk'])
+
+        summary = batch.groupby('taluk').agg(
+            total=('taluk', 'size'),
+            resolved=('closed', 'sum'),
+            action_sum=('action', 'sum'),
+            action_count=('action', 'count')
+        )
+        type_counts = batch.dropna(subset=['type']).groupby(['taluk', 'type']).size()
+        month_counts = batch.dropna(subset=['month']).groupby(['taluk', 'month']).size()
+
+        for taluk, row in summary.iterrows():
+            entry = self._entries.setdefault(taluk, {
+                'total': 0, 'resolved': 0, 'action_sum': 0.0, 'action_count': 0,
+                'types': {}, 'months': [0] * 12
+            })
+            entry['total'] += int(row['total'])
+            entry['resolved'] += int(row['resolved'])
+            entry['action_sum'] += float(row['action_sum'])
+            entry['action_count'] += int(row['action_count'])
+        for (taluk, incident_type), count in type_counts.items():
+            types = self._entries[taluk]['types']
+            types[incident_type] = types.get(incident_type, 0) + int(count)
+        for (taluk, month), count in month_counts.items():
+            self._entries[taluk]['months'][int(month) - 1] += int(count)
+
+        for taluk in summary.index:
+            self._payloads[taluk] = self._build_payload(taluk, self._entries[taluk])
+            self._serialized[taluk] = json.dumps(self._payloads[taluk])
+        self.version += 1
+
+    def _build_payload(self, taluk: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        avg_response_time = entry['action_sum'] / entry['action_count'] / 60 if entry['action_count'] else 0.0
+        return {
+            'taluk_name': taluk,
+            'total_incidents': entry['total'],
+            'resolved_incidents': entry['resolved'],
+            'pending_incidents': entry['total'] - entry['resolved'],
+            'avg_response_time': round(avg_response_time, 2),  # hours
+            'incident_types': dict(sorted(entry['types'].items(), key=lambda item: -item[1])),
+            'monthly_trend': {str(month): count for month, count in enumerate(entry['months'], start=1)}
+        }
+
+    def get(self, taluk: str) -> Optional[Dict[str, Any]]:
+        """
+        Statistics payload for a taluk (None if the taluk has no incidents).
+        """
+        return self._payloads.get(taluk)
+
+    def serialized(self, taluk: str) -> Optional[str]:
+        """
+        Statistics payload for a taluk as a JSON string (None if unknown).
+        """
+        return self._serialized.get(taluk)
+
+    def incident_counts(self) -> Dict[str, int]:
+        """
+        Total incidents per taluk.
+        """
+        return {taluk: entry['total'] for taluk, entry in self._entries.items()}
+
+class IncidentStore:
+    def __init__(self, frame: pd.DataFrame):
+        """
+        Columnar in-memory view of the incident data with precomputed aggregates.
+
+        Args:
+            frame (pd.DataFrame): Incident DataFrame as returned by load_incident_frame
+        """
+        self.frame = frame
+        self.num_rows = len(frame)
+        self.parse_report = frame.attrs.get('parse_report', {})
+
+        # Row positions ordered by Sl. No. for keyset pagination
+        if ID_COLUMN in frame.columns:
+            self.ids = frame[ID_COLUMN].to_numpy(dtype=np.int64)
+        else:
+            self.ids = np.arange(1, self.num_rows + 1, dtype=np.int64)
+        self.id_order = np.argsort(self.ids, kind='stable')
+        self.sorted_ids = self.ids[self.id_order]
+        self._sort_orders = {}
+        self._json_columns = None
+
+        # Dictionary-encoded categoricals
+        self.categoricals = {}
+        for col in CATEGORICAL_COLUMNS:
+            if col in frame.columns:
+                self.categoricals[col] = CategoricalColumn(frame[col])
+
+        # Timestamps as int64 nanoseconds
+        self.timestamps = {}
+        for col in DATE_COLUMNS:
+            if col in frame.columns:
+                self.timestamps[col] = _to_int64(frame[col])
+
+        # Durations as float64 minutes
+        self.durations = {}
+        for minutes_col in DURATION_COLUMNS.values():
+            if minutes_col in frame.columns:
+                self.durations[minutes_col] = frame[minutes_col].to_numpy(dtype=np.float64)
+            else:
+                self.durations[minutes_col] = np.full(self.num_rows, np.nan)
+
+        # Derived calendar and channel features (computed once, read-only)
+        self.features = build_feature_frame(
+            self.timestamps.get('Incident Reported at', np.full(self.num_rows, NAT)),
+            self.categoricals.get('Info_Source')
+        )
+
+        self.aggregates = {}
+        self._payloads = {}
+        self._serialized = {}
+        self._build_aggregates()
+        self._build_indexes()
+        self._build_payloads()
+
+        # Per-taluk statistics for the map view
+        self.taluk_stats = TalukStatsTable()
+        self.taluk_stats.add_incidents(frame)
+
+    @classmethod
+    def from_csv(cls, csv_path: str) -> 'IncidentStore':
+        """
+        Load the incident CSV once and build the store.
+
+        Args:
+            csv_path (str): Path to the incident CSV
+
+        Returns:
+            IncidentStore: Store over the loaded data
+        """
+        return cls(load_incident_frame(csv_path))
+
+    def positions_after(self, after: Optional[int] = None, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Row positions ordered by Sl. No., starting after a given Sl. No.
+
+        Args:
+            after (int, optional): Only return rows with a larger Sl. No.
+            positions (np.ndarray, optional): Restrict to these row positions (all rows if None)
+
+        Returns:
+            np.ndarray: Row positions in Sl. No. order
+        """
+        if positions is None:
+            start = int(np.searchsorted(self.sorted_ids, after, side='right')) if after is not None else 0
+            return self.id_order[start:]
+
+        positions = positions[np.argsort(self.ids[positions], kind='stable')]
+        if after is not None:
+            positions = positions[self.ids[positions] > after]
+        return positions
+
+    def _build_indexes(self):
+        """
+        Build secondary indexes for the filter endpoints: type, taluk and
+        (taluk, type) posting lists, open/closed row ids and a reported-time order.
+        """
+        types = self._categorical('Incident Type')
+        taluks = self._categorical('Taluk')
+        self.indexes = {
+            'type': PostingIndex(types.categories, types.codes),
+            'taluk': PostingIndex(taluks.categories, taluks.codes)
+        }
+
+        both = (taluks.codes >= 0) & (types.codes >= 0)
+        pair_codes = np.where(both, taluks.codes.astype(np.int64) * len(types) + types.codes, -1)
+        pair_keys = [(taluk, incident_type) for taluk in taluks.categories for incident_type in types.categories]
+        self.indexes['taluk_type'] = PostingIndex(pair_keys, pair_codes)
+
+        closed_at = self.timestamps.get('Closed At', np.full(self.num_rows, NAT))
+        self.status_rows = {
+            'closed': np.flatnonzero(closed_at != NAT).astype(np.int32),
+            'open': np.flatnonzero(closed_at == NAT).astype(np.int32)
+        }
+
+        # Rows with a reported timestamp, ordered by time for range lookups
+        self.reported = self.timestamps.get('Incident Reported at', np.full(self.num_rows, NAT))
+        present = np.flatnonzero(self.reported != NAT)
+        self.reported_order = present[np.argsort(self.reported[present], kind='stable')].astype(np.int32)
+        self.sorted_reported = self.reported[self.reported_order]
+
+    def filter(self, incident_type: Optional[str] = None, taluk: Optional[str] = None,
+               start: Optional[int] = None, end: Optional[int] = None,
+               status: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Row ids matching all given filters, answered from the secondary indexes.
+
+        Args:
+            incident_type (str, optional): Incident Type to match
+            taluk (str, optional): Taluk to match
+            start (int, optional): Earliest 'Incident Reported at' (int64 ns, inclusive)
+            end (int, optional): Latest 'Incident Reported at' (int64 ns, exclusive)
+            status (str, optional): 'open' or 'closed'
+
+        Returns:
+            Optional[np.ndarray]: Sorted int32 row ids, or None if no filter was given
+        """
+        candidates = []
+        if incident_type is not None and taluk is not None:
+            candidates.append(self.indexes['taluk_type'].get((taluk, incident_type)))
+        elif incident_type is not None:
+            candidates.append(self.indexes['type'].get(incident_type))
+        elif taluk is not None:
+            candidates.append(self.indexes['taluk'].get(taluk))
+        if status is not None:
+            if status not in self.status_rows:
+                raise ValueError(f"Unknown status '{status}' (expected 'open' or 'closed')")
+            candidates.append(self.status_rows[status])
+
+        has_range = start is not None or end is not None
+        if not candidates and not has_range:
+            return None
+
+        if candidates:
+            rows = candidates[0]
+            for other in sorted(candidates[1:], key=len):
+                rows = _intersect_sorted(rows, other)
+            # Check the time range on the (already narrowed) candidates
+            if has_range:
+                times = self.reported[rows]
+                mask = times != NAT
+                if start is not None:
+                    mask &= times >= start
+                if end is not None:
+                    mask &= times < end
+                rows = rows[mask]
+            return rows
+
+        lo = int(np.searchsorted(self.sorted_reported, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(self.sorted_reported, end, side='left')) if end is not None else len(self.sorted_reported)
+        return np.sort(self.reported_order[lo:hi])
+
+    def records(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        JSON-ready records for the given row positions.
+
+        Columns are converted once on first use, so each call only gathers
+        the requested rows.
+
+        Args:
+            rows (np.ndarray): Row positions
+
+        Returns:
+            List[Dict[str, Any]]: One dict per row
+        """
+        if self._json_columns is None:
+            self._json_columns = json_columns(self.frame)
+        names = list(self._json_columns)
+        columns = [values[rows].tolist() for values in self._json_columns.values()]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def row_for_id(self, incident_id: int) -> Optional[int]:
+        """
+        Row position of an incident by Sl. No. (None if unknown).
+        """
+        pos = int(np.searchsorted(self.sorted_ids, incident_id))
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == incident_id:
+            return int(self.id_order[pos])
+        return None
+
+    def sort_order(self, column: Optional[str] = None, descending: bool = False):
+        """
+        Presorted row order for a column, built on first use and cached.
+
+        Missing values sort last and ties are broken by Sl. No.
+
+        Args:
+            column (str, optional): Column to sort by (None for the original row order)
+            descending (bool): Sort in descending order
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions in sort order, and the
+            rank of each row within that order
+        """
+        key = (column, descending)
+        if key not in self._sort_orders:
+            if column is None:
+                order = np.arange(self.num_rows)
+            else:
+                if column not in self.frame.columns:
+                    raise ValueError(f"Unknown sort column '{column}'")
+                ranks, _ = pd.factorize(self.frame[column], sort=True)
+                keys = np.where(ranks < 0, self.num_rows, -ranks if descending else ranks)
+                order = np.lexsort((self.ids, keys))
+            rank = np.empty(self.num_rows, dtype=np.int64)
+            rank[order] = np.arange(self.num_rows)
+            self._sort_orders[key] = (order, rank)
+        return self._sort_orders[key]
+
+    def _categorical(self, col: str) -> CategoricalColumn:
+        """
+        Get a dictionary-encoded column (all missing if the column does not exist).
+        """
+        if col not in self.categoricals:
+            return CategoricalColumn(pd.Series([None] * self.num_rows, dtype=object))
+        return self.categoricals[col]
+
+    def _build_aggregates(self):
+        """
+        Build count and sum/mean aggregates by type, taluk, officer, info source,
+        day, hour and weekday.
+        """
+        measures = {
+            'action_minutes': self.durations['Action Time Minutes'],
+            'close_minutes': self.durations['Close Time Minutes']
+        }
+
+        for name, col in [('type', 'Incident Type'), ('taluk', 'Taluk'),
+                          ('officer', 'Closed By Officer'), ('info_source', 'Info_Source')]:
+            column = self._categorical(col)
+            self.aggregates[name] = GroupAggregate(column.categories, column.codes, measures)
+
+        # Calendar and channel aggregates from the feature frame
+        features = self.features
+        day_keys, day_codes = _encode_values(features['day'])
+        self.aggregates['day'] = GroupAggregate(day_keys.astype('datetime64[D]').tolist(), day_codes, measures)
+
+        week_keys, week_codes = _encode_values(features['iso_year'].astype(np.int64) * 100 + features['iso_week'], -101)
+        self.aggregates['week'] = GroupAggregate([f"{key // 100}-{key % 100}" for key in week_keys], week_codes, measures)
+
+        month_keys, month_codes = _encode_values(features['year'].astype(np.int64) * 100 + features['month'], -100)
+        self.aggregates['month'] = GroupAggregate([f"{key // 100}-{key % 100}" for key in month_keys], month_codes, measures)
+
+        self.aggregates['hour'] = GroupAggregate(list(range(24)), features['hour'].astype(np.int64), measures)
+        self.aggregates['weekday'] = GroupAggregate(DAY_NAMES, features['day_of_week'].astype(np.int64), measures)
+        self.aggregates['channel'] = GroupAggregate(CHANNELS, features['channel'].astype(np.int64), measures)
+
+        # Taluk x type counts for the breakdown hierarchy
+        taluks = self.aggregates['taluk']
+        types = self.aggregates['type']
+        taluk_codes = self._categorical('Taluk').codes
+        type_codes = self._categorical('Incident Type').codes
+        both = (taluk_codes >= 0) & (type_codes >= 0)
+        pair_counts = np.bincount(
+            taluk_codes[both].astype(np.int64) * len(types.keys) + type_codes[both],
+            minlength=len(taluks.keys) * len(types.keys)
+        )
+        self.taluk_type_counts = pair_counts.reshape(len(taluks.keys), len(types.keys))
+
+    def _temporal_payload(self) -> Dict[str, Any]:
+        days = self.aggregates['day']
+        weeks = self.aggregates['week']
+        months = self.aggregates['month']
+        hours = self.aggregates['hour']
+        weekdays = self.aggregates['weekday']
+
+        # Rows without a timestamp are counted as non-monsoon
+        monsoon_count = int(self.features['is_monsoon'].sum())
+        non_monsoon_count = self.num_rows - monsoon_count
+        monsoon_analysis = []
+        if non_monsoon_count:
+            monsoon_analysis.append({'season': 'Non-Monsoon', 'count': non_monsoon_count})
+        if monsoon_count:
+            monsoon_analysis.append({'season': 'Monsoon', 'count': monsoon_count})
+
+        return {
+            'incidents_per_day': [
+                {'date': str(day), 'count': int(count)}
+                for day, count in zip(days.keys, days.counts)
+            ],
+            'incidents_per_week': [
+                {'year_week': key, 'count': int(count)}
+                for key, count in zip(weeks.keys, weeks.counts)
+            ],
+            'incidents_per_month': [
+                {'year_month': key, 'count': int(count)}
+                for key, count in zip(months.keys, months.counts)
+            ],
+            'monsoon_analysis': monsoon_analysis,
+            'hour_analysis': [
+                {'hour': hour, 'count': int(count)}
+                for hour, count in zip(hours.keys, hours.counts) if count
+            ],
+            'day_analysis': [
+                {'day_name': name, 'count': int(count)}
+                for name, count in zip(weekdays.keys, weekdays.counts) if count
+            ]
+        }
+
+    def _breakdown_payload(self) -> Dict[str, Any]:
+        types = self.aggregates['type']
+        sources = self.aggregates['info_source']
+        taluks = self.aggregates['taluk']
+
+        channels = self.aggregates['channel']
+
+        taluk_type_hierarchy = []
+        for taluk_code in sorted(range(len(taluks.keys)), key=lambda code: taluks.keys[code]):
+            for type_code in sorted(range(len(types.keys)), key=lambda code: types.keys[code]):
+                count = int(self.taluk_type_counts[taluk_code, type_code])
+                if count:
+                    taluk_type_hierarchy.append({
+                        'Taluk': taluks.keys[taluk_code],
+                        'Incident Type': types.keys[type_code],
+                        'count': count
+                    })
+
+        return {
+            'incident_type_breakdown': [
+                {'type': types.keys[code], 'count': int(types.counts[code])}
+                for code in types.ranked()
+            ],
+            'info_source_breakdown': [
+                {'source': sources.keys[code], 'count': int(sources.counts[code])}
+                for code in sources.ranked()
+            ],
+            'channel_breakdown': [
+                {'channel': channels.keys[code], 'count': int(channels.counts[code])}
+                for code in channels.ranked()
+            ] if 'Info_Source' in self.categoricals else [],
+            'taluk_type_hierarchy': taluk_type_hierarchy
+        }
+
+    def _response_payload(self) -> Dict[str, Any]:
+        def distribution(values):
+            data = values[~np.isnan(values)]
+            threshold = float(np.percentile(data, 99)) if len(data) else 0
+            outliers = int((data > threshold).sum()) if len(data) else 0
+            return {
+                'data': data.tolist(),
+                'outlier_threshold': threshold,
+                'outlier_count': outliers
+            }
+
+        officers = self.aggregates['officer']
+        avg_closure = officers.mean('close_minutes')
+        officer_leaderboard = [
+            {
+                'Closed By Officer': officers.keys[code],
+                'incidents_closed': int(officers.counts[code]),
+                'avg_closure_time': _to_float(avg_closure[code])
+            }
+            for code in officers.ranked(10)
+        ]
+
+        return {
+            'action_time_distribution': distribution(self.durations['Action Time Minutes']),
+            'closure_time_distribution': distribution(self.durations['Close Time Minutes']),
+            'officer_leaderboard': officer_leaderboard
+        }
+
+    def _kpi_payload(self) -> Dict[str, Any]:
+        action = self.durations['Action Time Minutes']
+        close = self.durations['Close Time Minutes']
+        closed_at = self.timestamps.get('Closed At', np.full(self.num_rows, NAT))
+
+        resolved_incidents = int((closed_at != NAT).sum())
+
+        action_total = int((~np.isnan(action)).sum())
+        action_compliant = int((action <= ACTION_SLA_HOURS * 60).sum())
+        closure_total = int((~np.isnan(close)).sum())
+        closure_compliant = int((close <= CLOSURE_SLA_HOURS * 60).sum())
+
+        types = self.aggregates['type']
+        taluks = self.aggregates['taluk']
+
+        return {
+            'total_incidents': self.num_rows,
+            'resolved_incidents': resolved_incidents,
+            'pending_incidents': self.num_rows - resolved_incidents,
+            'action_sla_rate': float(action_compliant / action_total * 100) if action_total > 0 else 0.0,
+            'closure_sla_rate': float(closure_compliant / closure_total * 100) if closure_total > 0 else 0.0,
+            'avg_action_time_minutes': float(np.nansum(action) / action_total) if action_total > 0 else 0.0,
+            'avg_closure_time_minutes': float(np.nansum(close) / closure_total) if closure_total > 0 else 0.0,
+            'top_incident_types': {types.keys[code]: int(types.counts[code]) for code in types.ranked(5)},
+            'top_taluks': {taluks.keys[code]: int(taluks.counts[code]) for code in taluks.ranked(5)}
+        }
+
+    def _build_payloads(self):
+        """
+        Build and serialize the dashboard payloads from the aggregates.
+        """
+        self._payloads = {
+            'kpi': self._kpi_payload(),
+            'temporal': self._temporal_payload(),
+            'breakdown': self._breakdown_payload(),
+            'response': self._response_payload()
+        }
+        self._serialized = {name: json.dumps(payload) for name, payload in self._payloads.items()}
+
+    def payload(self, name: str) -> Dict[str, Any]:
+        """
+        Get a precomputed dashboard payload ('kpi', 'temporal', 'breakdown' or 'response').
+        """
+        return self._payloads[name]
+
+    def serialized(self, name: str) -> str:
+        """
+        Get a precomputed dashboard payload as a JSON string.
+        """
+        return self._serialized[name]
+
+# Example usage
+if __name__ == "__main__":
+    # Get the directory of the current script
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_path = os.path.join(os.path.dirname(os.path.dirname(current_dir)), "modified_dataset.csv")
+
+    store = IncidentStore.from_csv(csv_path)
+    print(f"Loaded {store.num_rows} incidents")
+    print(json.dumps(store.payload('kpi'), indent=2))
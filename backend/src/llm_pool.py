@@ -0,0 +1,91 @@
+import time
+import threading
+from typing import Dict, Any, Callable, Iterable, Optional
+
+class UnknownModelError(ValueError):
+    """Raised when a model outside the pool's allowed set is requested."""
+
+class LLMPool:
+    def __init__(self, factory: Callable[[str], Any], models: Optional[Iterable[str]] = None,
+                 idle_seconds: float = 1800.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Keyed pool of LLM clients, one per model, created on first use and
+        dropped after being idle.
+
+        Args:
+            factory (Callable): Creates the client for a model name
+            models (Iterable[str], optional): Allowed model names (any name if None)
+            idle_seconds (float): Idle time after which a client is evicted
+            clock (Callable): Monotonic time source
+        """
+        self.factory = factory
+        self.models = set(models) if models is not None else None
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        self._clients = {}
+        self._last_used = {}
+        self._creating = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def _evict_idle(self, now: float):
+        for model in [m for m, used in self._last_used.items() if now - used > self.idle_seconds]:
+            del self._clients[model]
+            del self._last_used[model]
+            self.evicted += 1
+
+    def validate(self, model: str):
+        """
+        Check that a model may be requested.
+
+        Raises:
+            UnknownModelError: If the model is not in the allowed set
+        """
+        if self.models is not None and model not in self.models:
+            raise UnknownModelError(f"Unknown model: {model}")
+
+    def get(self, model: str):
+        """
+        Client for a model, creating it if needed.
+
+        Raises:
+            UnknownModelError: If the model is not in the allowed set
+        """
+        self.validate(model)
+
+        with self._lock:
+            now = self.clock()
+            self._evict_idle(now)
+            client = self._clients.get(model)
+            if client is not None:
+                self._last_used[model] = now
+                return client
+            creating = self._creating.setdefault(model, threading.Lock())
+
+        # Only one thread creates a given model; other models are not blocked
+        with creating:
+            with self._lock:
+                client = self._clients.get(model)
+                if client is not None:
+                    self._last_used[model] = self.clock()
+                    return client
+            client = self.factory(model)
+            with self._lock:
+                self._clients[model] = client
+                self._last_used[model] = self.clock()
+                self.created += 1
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Loaded clients and creation/eviction counters.
+        """
+        with self._lock:
+            now = self.clock()
+            return {
+                'idle_for_seconds': {model: round(now - used, 1) for model, used in self._last_used.items()},
+                'idle_seconds': self.idle_seconds,
+                'created': self.created,
+                'evicted': self.evicted
+            }
@@ -0,0 +1,92 @@
+import numpy as np
+from datetime import date
+from typing import Dict, Any, List, Optional, Union
+from chunk_store import ChunkStore
+
+# Record columns that can be filtered on by value
+FILTER_COLUMNS = ["taluk", "incident_type"]
+
+# Record column the date range applies to (the date the dashboard filters on;
+# received_date_time has day and month swapped in the source data)
+DATE_COLUMN = "incident_reported_at"
+
+def _normalize(value: Any) -> str:
+    return " ".join(str(value).split()).lower()
+
+def _as_list(values: Union[str, List[str]]) -> List[str]:
+    return [values] if isinstance(values, str) else list(values)
+
+class MetadataIndex:
+    def __init__(self, chunks: ChunkStore):
+        """
+        Per-attribute bitmaps over chunk positions, for pre-filtering searches.
+
+        Every distinct taluk and incident type (compared case-insensitively)
+        has a packed bitmap of the chunks whose record has that value; the
+        record date of each chunk is kept for range filters.
+
+        Args:
+            chunks (ChunkStore): Chunk store the positions refer to
+        """
+        self.num_chunks = len(chunks)
+        chunk_records = np.asarray(chunks.chunk_records)
+
+        self.bitmaps = {}
+        for column in FILTER_COLUMNS:
+            row_values = [_normalize(value) if value is not None else "" for value in chunks.column(column)]
+            values, row_codes = np.unique(np.array(row_values, dtype=object).astype(str), return_inverse=True)
+            chunk_codes = row_codes[chunk_records] if len(values) else np.empty(0, dtype=np.int64)
+            self.bitmaps[column] = {
+                str(value): np.packbits(chunk_codes == code)
+                for code, value in enumerate(values) if value
+            }
+
+        row_dates = np.array([str(value)[:10] if value else "NaT" for value in chunks.column(DATE_COLUMN)],
+                             dtype='datetime64[D]')
+        self.chunk_dates = row_dates[chunk_records] if len(row_dates) else np.empty(0, dtype='datetime64[D]')
+
+    def values(self, column: str) -> List[str]:
+        """
+        Distinct (normalized) values of a filter column.
+        """
+        return sorted(self.bitmaps[column])
+
+    def match(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Chunks matching all filters.
+
+        Args:
+            filters (Dict[str, Any], optional): "taluk" and "incident_type" (a value
+                or a list of accepted values), "date_from" and "date_to" (inclusive dates)
+
+        Returns:
+            np.ndarray: Boolean mask over chunk positions, or None if nothing is filtered
+        """
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        if not filters:
+            return None
+        unknown = set(filters) - set(FILTER_COLUMNS) - {"date_from", "date_to"}
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+        packed = np.full((self.num_chunks + 7) // 8, 0xFF, dtype=np.uint8)
+        for column in FILTER_COLUMNS:
+            if column not in filters:
+                continue
+            accepted = np.zeros_like(packed)
+            for value in _as_list(filters[column]):
+                bitmap = self.bitmaps[column].get(_normalize(value))
+                if bitmap is not None:
+                    accepted |= bitmap
+            packed &= accepted
+        mask = np.unpackbits(packed, count=self.num_chunks).astype(bool)
+
+        if "date_from" in filters:
+            mask &= self.chunk_dates >= np.datetime64(self._date(filters["date_from"]), 'D')
+        if "date_to" in filters:
+            mask &= self.chunk_dates <= np.datetime64(self._date(filters["date_to"]), 'D')
+        return mask
+
+    @staticmethod
+    def _date(value: Union[str, date]) -> str:
+        return value.isoformat() if isinstance(value, date) else str(value)[:10]
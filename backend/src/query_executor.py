@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, AsyncIterator
+
+class QueryRejected(Exception):
+    """Raised when the executor has no free worker or queue slot."""
+
+class QueryExecutor:
+    def __init__(self, max_workers: int = 2, queue_size: int = 8, timeout_seconds: float = 120.0):
+        """
+        Runs blocking query work (embedding, search, generation) off the event loop.
+
+        At most max_workers queries run at once and at most queue_size wait for a
+        worker; further submissions are rejected immediately.
+
+        Args:
+            max_workers (int): Number of worker threads
+            queue_size (int): Number of queries allowed to wait for a worker
+            timeout_seconds (float): Time a caller waits for its result
+        """
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _run(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on a worker thread and await its result.
+
+        Raises:
+            QueryRejected: If all workers and queue slots are taken
+            asyncio.TimeoutError: If the result is not ready within timeout_seconds
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise QueryRejected("Too many queries in progress")
+
+        future = self._executor.submit(self._run, fn, *args, **kwargs)
+        # The slot is freed when the work finishes, or when it is cancelled
+        # before starting because its caller timed out
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+
+    async def stream(self, fn: Callable, *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run the generator fn(*args, **kwargs) on a worker thread and yield its
+        items as they are produced.
+
+        The timeout covers the whole stream. Closing the iterator early stops the
+        generator at its next item.
+
+        Raises:
+            QueryRejected: If all workers and queue slots are taken
+            asyncio.TimeoutError: If the stream does not finish within timeout_seconds
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise QueryRejected("Too many queries in progress")
+
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        stopped = threading.Event()
+
+        def produce():
+            # Items are (finished, value); the last one carries an error or None
+            try:
+                for item in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(items.put_nowait, (False, item))
+            except Exception as e:
+                loop.call_soon_threadsafe(items.put_nowait, (True, e))
+            else:
+                loop.call_soon_threadsafe(items.put_nowait, (True, None))
+
+        future = self._executor.submit(self._run, produce)
+        future.add_done_callback(lambda _: self._slots.release())
+        deadline = loop.time() + self.timeout_seconds
+        try:
+            while True:
+                finished, value = await asyncio.wait_for(items.get(), max(0.0, deadline - loop.time()))
+                if finished:
+                    if value is not None:
+                        raise value
+                    return
+                yield value
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise
+        finally:
+            stopped.set()
+            future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Load and outcome counters of the executor.
+        """
+        return {
+            'max_workers': self.max_workers,
+            'queue_size': self.queue_size,
+            'timeout_seconds': self.timeout_seconds,
+            'active': self.active,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,437 @@
+import re
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
+from chunk_store import ChunkStore
+from incident_store import CategoricalColumn, GroupAggregate
+from metadata_filter import DATE_COLUMN
+
+# Record columns averaged by "average time" questions
+MEASURES = {
+    "resolution": "resolution_time_hours",
+    "action": "action_time_hours"
+}
+
+# Groups answered by ranking questions: key -> (record column, singular name, plural name)
+GROUPS = {
+    "type": ("incident_type", "incident type", "incident types"),
+    "taluk": ("taluk", "taluk", "taluks"),
+    "month": (DATE_COLUMN, "month", "months")
+}
+
+# Rows listed by ranking questions that do not give a number
+DEFAULT_TOP = 5
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                "eight": 8, "nine": 9, "ten": 10}
+
+MONTH_NAMES = ["january", "february", "march", "april", "may", "june", "july", "august",
+               "september", "october", "november", "december"]
+
+# Record column whose value marks an incident as closed (as on the dashboard)
+CLOSED_COLUMN = "closed_at"
+
+# Words asking for closed or still open incidents
+CLOSED_WORDS = {"resolve", "resolved", "close", "closed"}
+OPEN_WORDS = {"open", "pending", "unresolved", "unclosed", "outstanding"}
+
+# Words of duration questions, only answered together with "average"
+RESOLUTION_WORDS = {"resolve", "resolved", "resolving", "resolution", "close", "closed", "closing", "closure"}
+ACTION_WORDS = {"action", "actions", "respond", "responded", "response"}
+DURATION_WORDS = {"time", "times", "taken", "take", "takes", "took", "hours", "hour", "days"}
+
+# Words an aggregate question may contain besides taluks, incident types and dates.
+# A question with any other content word is left to retrieval.
+ROUTER_VOCABULARY = set("""
+a an the of in on at for by to from during per each all any across over with and or
+what which who how many much is are was were has have had do does did there
+show give tell list me us please
+number numbers count counts total overall
+incident incidents case cases record records report reports reported event events emergency emergencies
+type types kind kinds category categories taluk taluks area areas region regions
+month months monthly dataset data
+top most least fewest highest lowest largest smallest maximum minimum max min
+common frequent frequently often occurring occurred happened
+average mean typical time times taken take takes took hours hour days
+resolve resolved resolving resolution close closed closing closure
+open pending unresolved unclosed outstanding still currently
+action actions respond responded response
+dakshina kannada district smart system
+this that these those its their
+""".split())
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+def _normalize(value: Any) -> str:
+    return " ".join(TOKEN.findall(str(value).lower()))
+
+class IncidentAggregates:
+    def __init__(self, chunks: ChunkStore):
+        """
+        Incident counts and duration aggregates over the records of a chunk store.
+
+        Each record row is one incident. Whole-dataset aggregates by incident
+        type, taluk and month are computed once; filtered questions recount
+        only the matching rows.
+
+        Args:
+            chunks (ChunkStore): Chunk store whose records are aggregated
+        """
+        self.num_rows = chunks.meta["num_records"]
+        self.measures = {
+            name: np.array([np.nan if value is None else float(value) for value in chunks.column(column)])
+            for name, column in MEASURES.items()
+        }
+        self.dates = np.array([str(value)[:10] if value else "NaT" for value in chunks.column(DATE_COLUMN)],
+                              dtype='datetime64[D]')
+        self.closed = np.array([value is not None for value in chunks.column(CLOSED_COLUMN)], dtype=bool)
+        months = pd.Series(self.dates.astype('datetime64[M]').astype(str)).where(~np.isnat(self.dates))
+
+        self.columns = {
+            "type": CategoricalColumn(pd.Series(chunks.column("incident_type"), dtype=object)),
+            "taluk": CategoricalColumn(pd.Series(chunks.column("taluk"), dtype=object)),
+            "month": CategoricalColumn(months)
+        }
+        self.aggregates = {name: self._aggregate(name) for name in self.columns}
+
+        # Normalized value -> category, longest first so "mangaluru city corporation" wins over "mangaluru"
+        self.entities = {}
+        for name in ("type", "taluk"):
+            names = {_normalize(category): category for category in self.columns[name].categories}
+            self.entities[name] = sorted(names.items(), key=lambda item: -len(item[0]))
+
+    def rows(self, filters: Optional[Dict[str, Any]] = None) -> Optional[np.ndarray]:
+        """
+        Boolean mask of incidents matching filters ("taluk" and "incident_type" as a
+        value or list, inclusive "date_from" and "date_to", "status" "open" or "closed"),
+        or None for all incidents.
+        """
+        filters = {name: value for name, value in (filters or {}).items() if value is not None}
+        if not filters:
+            return None
+        mask = np.ones(self.num_rows, dtype=bool)
+        for name, column in (("taluk", "taluk"), ("incident_type", "type")):
+            if name in filters:
+                values = [filters[name]] if isinstance(filters[name], str) else filters[name]
+                wanted = {_normalize(value) for value in values}
+                categories = self.columns[column]
+                accepted = [code for code, category in enumerate(categories.categories) if _normalize(category) in wanted]
+                mask &= np.isin(categories.codes, accepted)
+        for name, compare in (("date_from", np.greater_equal), ("date_to", np.less_equal)):
+            if name in filters:
+                value = filters[name]
+                bound = np.datetime64(value.isoformat() if isinstance(value, date) else str(value)[:10], 'D')
+                mask &= ~np.isnat(self.dates) & compare(self.dates, bound)
+        if "status" in filters:
+            mask &= self.closed if filters["status"] == "closed" else ~self.closed
+        return mask
+
+    def group(self, name: str, mask: Optional[np.ndarray] = None) -> GroupAggregate:
+        """
+        Counts and duration sums of the incidents in mask, grouped by "type", "taluk" or "month".
+        """
+        if mask is None:
+            return self.aggregates[name]
+        return self._aggregate(name, mask)
+
+    def _aggregate(self, name: str, mask: Optional[np.ndarray] = None) -> GroupAggregate:
+        column = self.columns[name]
+        codes = column.codes if mask is None else np.where(mask, column.codes, -1)
+        measures = self.measures if mask is None else {
+            measure: np.where(mask, values, np.nan) for measure, values in self.measures.items()
+        }
+        return GroupAggregate(column.categories, codes, measures)
+
+    def latest_month(self) -> Optional[Tuple[date, date]]:
+        """
+        First and last day of the latest month with incidents.
+        """
+        if np.isnat(self.dates).all():
+            return None
+        month = self.dates[~np.isnat(self.dates)].max().astype('datetime64[M]')
+        return (month.astype('datetime64[D]').astype(date),
+                ((month + 1).astype('datetime64[D]') - 1).astype(date))
+
+class QueryRouter:
+    def __init__(self, aggregates: IncidentAggregates):
+        """
+        Rule-based router answering count, ranking and average questions exactly
+        from incident aggregates, leaving open-ended questions to retrieval.
+
+        Args:
+            aggregates (IncidentAggregates): Aggregates the answers are computed from
+        """
+        self.aggregates = aggregates
+
+    def route(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer an aggregate question.
+
+        Args:
+            query (str): The query string
+            filters (Dict[str, Any], optional): Request filters, combined with those in the question
+
+        Returns:
+            Dict[str, Any]: "intent", "answer" and the computed "data", or None
+            if the question is not an aggregate question
+        """
+        text = _normalize(query)
+        filters = dict(filters or {})
+        text = self._extract_entities(text, filters)
+        if text is None:
+            return None
+        words = text.split()
+        # Numbers other than "top N" (thresholds, ids, ...) are not understood
+        for previous, word in zip([""] + words, words):
+            if word.isdigit() or word in NUMBER_WORDS:
+                if previous != "top":
+                    return None
+            elif word not in ROUTER_VOCABULARY:
+                return None
+        word_set = set(words)
+
+        measure = None
+        if word_set & {"average", "mean", "typical"}:
+            if word_set & RESOLUTION_WORDS:
+                measure = "resolution"
+            elif word_set & ACTION_WORDS:
+                measure = "action"
+            else:
+                return None
+        elif word_set & (RESOLUTION_WORDS - CLOSED_WORDS | ACTION_WORDS | DURATION_WORDS):
+            return None
+
+        # Closed/open incidents ("resolve" and "close" belong to the measure in average questions)
+        statuses = set()
+        if measure is None and word_set & CLOSED_WORDS:
+            statuses.add("closed")
+        if word_set & OPEN_WORDS:
+            statuses.add("open")
+        if statuses:
+            if len(statuses) > 1 or "status" in filters:
+                return None
+            filters["status"] = statuses.pop()
+
+        group = None
+        if word_set & {"type", "types", "kind", "kinds", "category", "categories"}:
+            group = "type"
+        elif word_set & {"taluk", "taluks", "area", "areas", "region", "regions"}:
+            group = "taluk"
+        elif word_set & {"month", "months", "monthly"} and "last" not in word_set:
+            group = "month"
+
+        ascending = bool(word_set & {"least", "fewest", "lowest", "smallest", "minimum", "min"})
+        ranking = ascending or bool(word_set & {"top", "most", "highest", "largest", "maximum", "max", "common",
+                                                "frequent", "frequently", "often", "which"})
+        mask = self.aggregates.rows(filters)
+
+        if group and ranking:
+            return self._ranking(group, measure, self._limit(words, group), ascending, mask, filters)
+        if group and word_set & {"per", "each", "by", "monthly"}:
+            return self._ranking(group, measure, None, ascending, mask, filters)
+        if measure:
+            return self._average(measure, mask, filters)
+        if word_set & {"how", "number", "count", "total", "many"} and group is None:
+            return self._count(mask, filters)
+        return None
+
+    def _extract_entities(self, text: str, filters: Dict[str, Any]) -> Optional[str]:
+        """
+        Move taluks, incident types, open/closed status and dates (a day, month or
+        year) named in the question into filters, returning the rest of the question
+        (None if they conflict with the filters).
+        """
+        padded = f" {text} "
+        for name, field in (("taluk", "taluk"), ("type", "incident_type")):
+            found = []
+            for normalized, category in self.aggregates.entities[name]:
+                pattern = re.compile(rf" {re.escape(normalized)}s? ")
+                if pattern.search(padded):
+                    found.append(category)
+                    padded = pattern.sub(" ", padded)
+            if found:
+                if field in filters:
+                    return None
+                filters[field] = found
+
+        # "not (yet) closed/resolved" asks for open incidents
+        padded = re.sub(r" (?:not|never) (?:yet )?(?:been )?(?:closed|resolved) ", " unresolved ", padded)
+
+        latest = self.aggregates.latest_month()
+        default_year = latest[1].year if latest else date.today().year
+        months = "|".join(MONTH_NAMES)
+        day_match = (re.search(rf" (?P<day>\d{{1,2}})(?:st|nd|rd|th)? (?:of )?(?P<month>{months})(?: (?P<year>\d{{4}}))? ", padded)
+                     or re.search(rf" (?P<month>{months}) (?P<day>\d{{1,2}})(?:st|nd|rd|th)?(?: (?P<year>\d{{4}}))? ", padded))
+        month_match = re.search(rf" (?P<month>{months})(?: (?P<year>\d{{4}}))? ", padded)
+        year_match = re.search(r" (?P<year>(?:19|20)\d\d) ", padded)
+        if day_match:
+            year = int(day_match.group("year") or default_year)
+            try:
+                day = date(year, MONTH_NAMES.index(day_match.group("month")) + 1, int(day_match.group("day")))
+            except ValueError:
+                return None
+            dates, matched = (day, day), day_match
+        elif month_match:
+            year = int(month_match.group("year") or default_year)
+            start = np.datetime64(f"{year:04d}-{MONTH_NAMES.index(month_match.group('month')) + 1:02d}", 'M')
+            dates = (start.astype('datetime64[D]').astype(date), ((start + 1).astype('datetime64[D]') - 1).astype(date))
+            matched = month_match
+        elif re.search(r" (last|latest|recent|most recent) month ", padded):
+            if latest is None:
+                return None
+            dates, matched = latest, re.search(r" (last|latest|recent|most recent) month ", padded)
+        elif year_match:
+            year = int(year_match.group("year"))
+            dates, matched = (date(year, 1, 1), date(year, 12, 31)), year_match
+        else:
+            return padded.strip()
+
+        # Dates in the question narrow the requested range
+        date_from = max(dates[0], self._as_date(filters["date_from"])) if filters.get("date_from") else dates[0]
+        date_to = min(dates[1], self._as_date(filters["date_to"])) if filters.get("date_to") else dates[1]
+        filters["date_from"], filters["date_to"] = date_from, date_to
+        return padded.replace(matched.group(0), " ", 1).strip()
+
+    @staticmethod
+    def _as_date(value: Any) -> date:
+        return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+    @staticmethod
+    def _limit(words: List[str], group: str) -> int:
+        for word, following in zip(words, words[1:] + [""]):
+            if word == "top" and (following.isdigit() or following in NUMBER_WORDS):
+                return int(following) if following.isdigit() else NUMBER_WORDS[following]
+        # "Which taluk has ..." asks for one, "Which taluks ..." for several
+        if "which" in words and GROUPS[group][1].split()[-1] in words:
+            return 1
+        return DEFAULT_TOP
+
+    @staticmethod
+    def _scope(filters: Dict[str, Any]) -> str:
+        """
+        Description of the filters for answers ("" when unfiltered).
+        """
+        parts = []
+        if filters.get("status"):
+            parts.append("that were closed" if filters["status"] == "closed" else "that are still open")
+        if filters.get("incident_type"):
+            types = filters["incident_type"]
+            parts.append(f"of type {' or '.join([types] if isinstance(types, str) else types)}")
+        if filters.get("taluk"):
+            taluks = filters["taluk"]
+            parts.append(f"in {' or '.join([taluks] if isinstance(taluks, str) else taluks)}")
+        if filters.get("date_from") and filters.get("date_to") and str(filters["date_from"]) == str(filters["date_to"]):
+            parts.append(f"reported on {filters['date_from']}")
+        elif filters.get("date_from") and filters.get("date_to"):
+            parts.append(f"reported between {filters['date_from']} and {filters['date_to']}")
+        elif filters.get("date_from"):
+            parts.append(f"reported from {filters['date_from']}")
+        elif filters.get("date_to"):
+            parts.append(f"reported until {filters['date_to']}")
+        return " " + " ".join(parts) if parts else ""
+
+    def _count(self, mask: Optional[np.ndarray], filters: Dict[str, Any]) -> Dict[str, Any]:
+        count = self.aggregates.num_rows if mask is None else int(mask.sum())
+        return {
+            "intent": "count",
+            "answer": f"There {'is' if count == 1 else 'are'} {_incidents(count)}{self._scope(filters)}.",
+            "data": {"count": count, "filters": _serializable(filters)}
+        }
+
+    def _average(self, measure: str, mask: Optional[np.ndarray], filters: Dict[str, Any]) -> Dict[str, Any]:
+        values = self.aggregates.measures[measure]
+        if mask is not None:
+            values = values[mask]
+        values = values[~np.isnan(values)]
+        verb = "resolve" if measure == "resolution" else "take action on"
+        if len(values) == 0:
+            answer = f"No incidents{self._scope(filters)} have a recorded time to {verb} them."
+            mean = None
+        else:
+            mean = float(values.mean())
+            answer = (f"The average time taken to {verb} incidents{self._scope(filters)} is {mean:.2f} hours "
+                      f"({mean / 24:.2f} days), over {_incidents(len(values))} with a recorded time "
+                      f"(median {float(np.median(values)):.2f} hours).")
+        return {
+            "intent": "average",
+            "answer": answer,
+            "data": {
+                "measure": MEASURES[measure],
+                "mean_hours": mean,
+                "median_hours": float(np.median(values)) if len(values) else None,
+                "incidents_with_value": int(len(values)),
+                "filters": _serializable(filters)
+            }
+        }
+
+    def _ranking(self, group: str, measure: Optional[str], limit: Optional[int], ascending: bool,
+                 mask: Optional[np.ndarray], filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Groups ranked by count or mean duration (all groups when limit is None,
+        months then in calendar order).
+        """
+        aggregate = self.aggregates.group(group, mask)
+        present = np.flatnonzero(aggregate.counts > 0)
+        if measure:
+            values = aggregate.mean(measure)
+            present = present[~np.isnan(values[present])]
+        else:
+            values = aggregate.counts
+        signed = values[present] if ascending else -values[present]
+        order = present[np.argsort(signed, kind='stable')][:limit]
+        if limit is None and group == "month":
+            order = sorted(order, key=lambda code: aggregate.keys[code])
+
+        _, singular, plural = GROUPS[group]
+        rows = []
+        for code in order:
+            row = {"key": aggregate.keys[code], "count": int(aggregate.counts[code])}
+            if measure:
+                row["mean_hours"] = float(values[code])
+                row["incidents_with_value"] = int(aggregate.valid[measure][code])
+            rows.append(row)
+
+        verb = "resolve" if measure == "resolution" else "take action on"
+        if not rows:
+            answer = f"No incidents{self._scope(filters)} were found."
+        elif measure:
+            listed = ", ".join(f"{row['key']} ({row['mean_hours']:.2f} hours over {_incidents(row['incidents_with_value'])})"
+                               for row in rows)
+            if limit is None:
+                answer = f"Average time to {verb} incidents{self._scope(filters)} per {singular}: {listed}."
+            else:
+                extreme = "shortest" if ascending else "longest"
+                answer = (f"The {plural if len(rows) > 1 else singular} with the {extreme} average time to "
+                          f"{verb} incidents{self._scope(filters)}: {listed}.")
+        elif limit is None:
+            listed = ", ".join(f"{row['key']} ({row['count']})" for row in rows)
+            answer = f"Incidents{self._scope(filters)} per {singular}: {listed}."
+        else:
+            total = int(aggregate.counts.sum())
+            listed = ", ".join(f"{row['key']} ({row['count']})" for row in rows)
+            extreme = "fewest" if ascending else "most"
+            if len(rows) == 1:
+                answer = (f"The {singular} with the {extreme} incidents{self._scope(filters)} is {listed}, "
+                          f"out of {_incidents(total)}.")
+            else:
+                answer = (f"The {len(rows)} {plural} with the {extreme} incidents{self._scope(filters)} are "
+                          f"{listed}, out of {_incidents(total)}.")
+        return {
+            "intent": "ranking" if limit is not None else "breakdown",
+            "answer": answer,
+            "data": {
+                "group_by": group,
+                "measure": MEASURES[measure] if measure else "count",
+                "order": "calendar" if limit is None and group == "month" else ("ascending" if ascending else "descending"),
+                "rows": rows,
+                "filters": _serializable(filters)
+            }
+        }
+
+def _incidents(count: int) -> str:
+    return f"{count} incident" if count == 1 else f"{count} incidents"
+
+def _serializable(filters: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: value.isoformat() if isinstance(value, date) else value
+            for name, value in filters.items() if value is not None}
@@ -1,168 +1,724 @@
 import os
 import json
+import time
+import threading
 import faiss
 import numpy as np
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterator, Iterable, Tuple
 from langchain_community.llms import Ollama
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from embedding_cache import QueryEmbeddingCache
+from answer_cache import content_digest
+from fake_llm import FakeTokenLLM, FAKE_MODEL_NAME
+from llm_pool import LLMPool
+from warm_start import source_signature, read_snapshot, write_snapshot
+from chunk_store import ChunkStore, CHUNK_STORE_DIR
+from vector_index import configure_search, search_parameters
+from bm25_index import BM25Index, BM25_DIR, tokenize
+from metadata_filter import MetadataIndex
+from query_router import IncidentAggregates, QueryRouter
+from context_builder import ContextBuilder, DEFAULT_CONTEXT_TOKENS, estimate_tokens
+
+# Embedding model used when the vector store has no metadata
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# Components loaded in parallel by IncidentRetriever.start_loading
+COMPONENTS = ["vector_store", "embedding_model", "llm"]
+
+# Bundle of the FAISS index and its digest for fast restarts
+WARM_START_FILE = "warm_start.pkl"
+
+# Reciprocal rank fusion constant and candidates taken from each ranking per result
+RRF_K = 60
+HYBRID_CANDIDATES_PER_RESULT = 4
+
+# Queries of at most this many known terms (and not phrased as a question) skip the encoder
+KEYWORD_QUERY_MAX_TERMS = 3
+# LLM generations run at once for a batch of queries
+BATCH_LLM_CONCURRENCY = 2
+
+QUESTION_WORDS = {"what", "which", "how", "why", "when", "where", "who", "whom", "whose",
+                  "is", "are", "was", "were", "do", "does", "did", "can", "could", "should",
+                  "list", "show", "compare", "tell", "give", "explain", "summarize", "describe"}
+
+# Prompt used to answer questions from retrieved incident chunks
+ANSWER_TEMPLATE = """
+        You are an AI assistant for the Mangalore Smart City Incident Management System.
+        
+        Use the following incident data to answer the user's question. The data includes information about various incidents in Mangalore, including landslides, floods, tree falls, and other emergencies.
+        
+        INCIDENT DATA:
+        {context}
+        
+        USER QUESTION: {query}
+        
+        Provide a clear, concise, and accurate answer based only on the information provided above. Include relevant statistics or data points if available.
+        
+        If the question asks about time-related information (like resolution times, response times, etc.), be sure to include that in your answer.
+        
+        If the question asks about specific locations or taluks, provide that geographic information in your answer.
+        
+        If the question asks for a comparison between different incident types, locations, or time periods, structure your answer to clearly show the comparison.
+        
+        If you don't know the answer or the information is not in the provided data, say "I don't have enough information to answer this question."
+        
+        ANSWER:
+        """
+
+def create_llm(model_name: str):
+    """
+    LLM client for a model name ("fake" selects the offline FakeTokenLLM).
+    """
+    if model_name == FAKE_MODEL_NAME:
+        return FakeTokenLLM()
+    return Ollama(model=model_name)
+
+def context_stats(context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Token and chunk counts of a context from IncidentRetriever.build_context.
+    """
+    return {name: value for name, value in context.items() if name not in ("text", "prompt")}
 
 class IncidentRetriever:
-    def __init__(self, vector_store_dir: str, model_name: str = "mistral"):
+    def __init__(self, vector_store_dir: str, model_name: str = "mistral",
+                 embedding_cache_size: int = 1024, embedding_cache_path: Optional[str] = None,
+                 models: Optional[Iterable[str]] = None, llm_idle_seconds: float = 1800.0,
+                 nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                 context_tokens: int = DEFAULT_CONTEXT_TOKENS):
         """
         Initialize the IncidentRetriever with the vector store directory and Ollama model.
         
         Args:
             vector_store_dir (str): Directory containing the vector store
-            model_name (str): Name of the Ollama model to use
+            model_name (str): Name of the default Ollama model
+            embedding_cache_size (int): Number of query embeddings kept in memory
+            embedding_cache_path (str, optional): SQLite file for persisting query embeddings
+            models (Iterable[str], optional): Models that may be requested (any if None)
+            llm_idle_seconds (float): Idle time after which an LLM client is dropped
+            nprobe (int, optional): IVF lists searched per query (overrides the build setting)
+            ef_search (int, optional): HNSW candidate list size (overrides the build setting)
+            context_tokens (int): Token budget of the incident context in a prompt
         """
         self.vector_store_dir = vector_store_dir
         self.model_name = model_name
         self.chunks = None
         self.index = None
+        self.lexical_index = None
+        self.metadata_index = None
+        self.router = None
         self.embedding_model = None
-        self.llm = None
+        self.embedding_model_name = DEFAULT_EMBEDDING_MODEL
+        self.embedding_cache_size = embedding_cache_size
+        self.embedding_cache_path = embedding_cache_path
+        self.embedding_cache = None
+        self.llm_pool = LLMPool(create_llm, models, idle_seconds=llm_idle_seconds)
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.context_builder = ContextBuilder(context_tokens)
+        self.index_config = {}
+        self.vector_store_source = None
+        self._index_digest = None
+        self._stages = {}
+        self._load_times = {}
+        self._load_lock = threading.Lock()
         
+    def start_loading(self):
+        """
+        Start loading the vector store, embedding model and LLM client in parallel
+        without waiting for them. Calling it again has no effect.
+        """
+        with self._load_lock:
+            if self._stages:
+                return
+            loaders = {
+                "vector_store": self._load_vector_store,
+                "embedding_model": self._load_embedding_model,
+                "llm": self._load_llm
+            }
+            loader_pool = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="retriever-load")
+            for name, loader in loaders.items():
+                self._stages[name] = loader_pool.submit(self._timed_load, name, loader)
+            loader_pool.shutdown(wait=False)
+    
+    def _timed_load(self, name: str, loader):
+        start_time = time.time()
+        loader()
+        self._load_times[name] = (time.time() - start_time) * 1000
+    
+    def _require(self, *components: str):
+        """
+        Wait until components are loaded, starting the load if needed.
+        Re-raises the error of a component that failed to load.
+        """
+        self.start_loading()
+        for name in components:
+            self._stages[name].result()
+    
     def load_resources(self):
         """
         Load all necessary resources: chunks, index, embedding model, and LLM.
         """
         print("Loading resources...")
+        self._require(*COMPONENTS)
+    
+    def readiness(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Loading state of each component.
         
-        # Load chunks
-        chunks_path = os.path.join(self.vector_store_dir, "chunks.json")
-        with open(chunks_path, 'r') as f:
-            self.chunks = json.load(f)
-        print(f"Loaded {len(self.chunks)} chunks")
+        Returns:
+            Dict[str, Dict[str, Any]]: Status ("not_started", "loading", "ready" or
+            "failed") per component, with the load time or error
+        """
+        readiness = {}
+        for name in COMPONENTS:
+            future = self._stages.get(name)
+            if future is None:
+                state = {"status": "not_started"}
+            elif not future.done():
+                state = {"status": "loading"}
+            elif future.exception() is not None:
+                state = {"status": "failed", "error": str(future.exception())}
+            else:
+                state = {"status": "ready", "load_ms": round(self._load_times[name], 1)}
+            readiness[name] = state
+        if readiness["vector_store"]["status"] == "ready":
+            readiness["vector_store"]["source"] = self.vector_store_source
+        return readiness
+    
+    @property
+    def index_digest(self) -> str:
+        """
+        Content hash identifying this build of the vector store (for answer caching).
+        """
+        self._require("vector_store")
+        return self._index_digest
+    
+    def _read_metadata(self) -> Dict[str, Any]:
+        """
+        Contents of embedding_metadata.json written by the pipeline (empty if missing).
+        """
+        metadata_path = os.path.join(self.vector_store_dir, "embedding_metadata.json")
+        if not os.path.exists(metadata_path):
+            return {}
+        with open(metadata_path, 'r') as f:
+            return json.load(f)
+    
+    def _load_vector_store(self):
+        """
+        Open the memory-mapped chunk store and BM25 index, build the metadata
+        filter bitmaps and incident aggregates, and load the FAISS index.
         
-        # Load FAISS index
+        The chunk store and BM25 index are rebuilt from chunks.json when they
+        are missing or stale.
+        The index comes from the warm-start snapshot when it is current and
+        otherwise from the pipeline output (then the snapshot is refreshed).
+        """
+        chunks_path = os.path.join(self.vector_store_dir, "chunks.json")
         index_path = os.path.join(self.vector_store_dir, "faiss_index.bin")
-        self.index = faiss.read_index(index_path)
-        print(f"Loaded FAISS index with {self.index.ntotal} vectors")
+        store_dir = os.path.join(self.vector_store_dir, CHUNK_STORE_DIR)
+        bm25_dir = os.path.join(self.vector_store_dir, BM25_DIR)
+        snapshot_path = os.path.join(self.vector_store_dir, WARM_START_FILE)
+        
+        chunks_signature = source_signature([chunks_path])
+        if not ChunkStore.is_current(store_dir, chunks_signature):
+            print(f"Building chunk store from {chunks_path}...")
+            with open(chunks_path, 'r') as f:
+                ChunkStore.write(store_dir, json.load(f), chunks_signature)
+        chunks = ChunkStore(store_dir)
+        if not BM25Index.is_current(bm25_dir, chunks_signature):
+            print(f"Building BM25 index from {store_dir}...")
+            BM25Index.write(bm25_dir, [chunks.text(position) for position in range(len(chunks))], chunks_signature)
+        lexical_index = BM25Index(bm25_dir)
+        metadata_index = MetadataIndex(chunks)
+        router = QueryRouter(IncidentAggregates(chunks))
+        
+        signature = source_signature([index_path, chunks_path])
+        snapshot = read_snapshot(snapshot_path, signature)
+        if snapshot is not None:
+            index = faiss.deserialize_index(snapshot["index"])
+            digest = snapshot["digest"]
+            self.vector_store_source = "snapshot"
+        else:
+            index = faiss.read_index(index_path)
+            digest = content_digest([index_path, chunks_path])
+            try:
+                write_snapshot(snapshot_path, signature, {
+                    "index": faiss.serialize_index(index),
+                    "digest": digest
+                })
+            except OSError as e:
+                print(f"Could not write warm-start snapshot: {str(e)}")
+            self.vector_store_source = "files"
+        
+        # Search parameters recorded at build time, unless overridden
+        self.index_config = self._read_metadata().get("index") or {}
+        configure_search(index, self.index_config, nprobe=self.nprobe, ef_search=self.ef_search)
+        self.chunks, self.lexical_index, self.metadata_index = chunks, lexical_index, metadata_index
+        self.router = router
+        self.index, self._index_digest = index, digest
+        print(f"Loaded {len(self.chunks)} chunks and {self.index_config.get('type', 'flat_l2')} FAISS index "
+              f"with {self.index.ntotal} vectors (from {self.vector_store_source})")
+    
+    def _load_embedding_model(self):
+        """
+        Load the embedding model the index was built with, and its query cache.
+        """
+        self.embedding_model_name = self._read_metadata().get("embedding_model", DEFAULT_EMBEDDING_MODEL)
         
-        # Load embedding model
         print("Loading embedding model...")
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
+        embedding_model = HuggingFaceEmbeddings(
+            model_name=self.embedding_model_name,
             model_kwargs={'device': 'cpu'},
             encode_kwargs={'normalize_embeddings': True}
         )
+        self.embedding_cache = QueryEmbeddingCache(
+            self.embedding_model_name,
+            max_entries=self.embedding_cache_size,
+            disk_path=self.embedding_cache_path
+        )
+        self.embedding_model = embedding_model
         print("Embedding model loaded")
-        
-        # Initialize Ollama LLM
+    
+    def _load_llm(self):
+        """
+        Create the client of the default model.
+        """
         print(f"Initializing Ollama with model {self.model_name}...")
-        self.llm = Ollama(model=self.model_name)
+        self.llm_pool.get(self.model_name)
         print("Ollama initialized")
         
-    def retrieve_relevant_chunks(self, query: str, k: int = 5) -> List[Dict]:
+    def embed_query(self, query: str) -> np.ndarray:
         """
-        Retrieve the k most relevant chunks for a query.
+        Embed a query, reusing cached embeddings of previously seen queries.
         
         Args:
             query (str): The query string
-            k (int): Number of chunks to retrieve
             
         Returns:
-            List[Dict]: List of relevant chunks with metadata
+            np.ndarray: float32 query embedding
+        """
+        self._require("embedding_model")
+        embedding = self.embedding_cache.get(query)
+        if embedding is None:
+            embedding = self.embedding_cache.put(query, self.embedding_model.embed_query(query))
+        return embedding
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
         """
-        if self.index is None or self.chunks is None or self.embedding_model is None:
-            self.load_resources()
+        Embed several queries, computing those not in the cache with one model call.
+        
+        Args:
+            queries (List[str]): The query strings
             
-        # Generate embedding for the query
-        query_embedding = self.embedding_model.embed_query(query)
+        Returns:
+            np.ndarray: (len(queries), dim) float32 query embeddings
+        """
+        self._require("embedding_model")
+        embeddings = [self.embedding_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(query for query, embedding in zip(queries, embeddings) if embedding is None))
+        if missing:
+            computed = {
+                query: self.embedding_cache.put(query, vector)
+                for query, vector in zip(missing, self.embedding_model.embed_documents(missing))
+            }
+            embeddings = [computed[query] if embedding is None else embedding
+                          for query, embedding in zip(queries, embeddings)]
+        return np.vstack(embeddings).astype(np.float32, copy=False)
         
-        # Search the index
+    def is_keyword_query(self, query: str) -> bool:
+        """
+        Whether a query is a few known keywords rather than a question.
+        """
+        self._require("vector_store")
+        words = query.lower().split()
+        terms = tokenize(query)
+        if not terms or len(terms) > KEYWORD_QUERY_MAX_TERMS:
+            return False
+        if "?" in query or words[0].strip(".,:;!") in QUESTION_WORDS:
+            return False
+        return all(term in self.lexical_index for term in terms)
+    
+    def _vector_search(self, query_embeddings: np.ndarray, k: int,
+                       candidates: Optional[np.ndarray] = None) -> List[np.ndarray]:
+        """
+        Chunk positions of the k nearest neighbours of each query embedding, in
+        one search over all rows, searching only the candidate chunks if a mask is given.
+        """
+        parameters = None
+        if candidates is not None:
+            # Keep the selector alive for the duration of the search
+            selector = faiss.IDSelectorBatch(np.ascontiguousarray(np.asarray(self.chunks.chunk_ids)[candidates]))
+            parameters = search_parameters(self.index_config, selector, self.nprobe, self.ef_search)
         distances, indices = self.index.search(
-            np.array([query_embedding]).astype('float32'), 
-            k=min(k, len(self.chunks))
+            np.ascontiguousarray(query_embeddings, dtype=np.float32),
+            k=min(k, len(self.chunks)),
+            params=parameters
         )
-        
-        # Get the relevant chunks
-        relevant_chunks = [self.chunks[idx] for idx in indices[0]]
-        
-        return relevant_chunks
+        # Index ids map to chunk positions
+        rankings = []
+        for row in indices:
+            positions = self.chunks.positions(row[row >= 0])
+            rankings.append(positions[positions >= 0])
+        return rankings
     
-    def generate_answer(self, query: str, relevant_chunks: List[Dict]) -> str:
+    def retrieve(self, query: str, k: int = 5,
+                 filters: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict], str]:
         """
-        Generate an answer to the query using the relevant chunks and Ollama.
+        Retrieve the k most relevant chunks for a query.
+        
+        Short keyword queries are answered from the BM25 index alone, without
+        embedding the query. Other queries fuse the BM25 and vector rankings
+        with reciprocal rank fusion. Filters are applied before ranking, so
+        only the matching chunks are searched.
         
         Args:
             query (str): The query string
-            relevant_chunks (List[Dict]): List of relevant chunks
+            k (int): Number of chunks to retrieve
+            filters (Dict[str, Any], optional): Metadata filters (see MetadataIndex.match)
             
         Returns:
-            str: Generated answer
+            Tuple[List[Dict], str]: Relevant chunks with metadata, and the
+            retrieval mode ("lexical" or "hybrid")
         """
-        if self.llm is None:
-            self.load_resources()
-            
-        # Prepare context from chunks
-        context = "\n\n".join([chunk["text"] for chunk in relevant_chunks])
-        
-        # Create prompt template
-        template = """
-        You are an AI assistant for the Mangalore Smart City Incident Management System.
-        
-        Use the following incident data to answer the user's question. The data includes information about various incidents in Mangalore, including landslides, floods, tree falls, and other emergencies.
-        
-        INCIDENT DATA:
-        {context}
-        
-        USER QUESTION: {query}
-        
-        Provide a clear, concise, and accurate answer based only on the information provided above. Include relevant statistics or data points if available.
+        return self.retrieve_many([query], k, filters)[0]
+    
+    def retrieve_many(self, queries: List[str], k: int = 5,
+                      filters: Optional[Dict[str, Any]] = None) -> List[Tuple[List[Dict], str]]:
+        """
+        Retrieve the k most relevant chunks for each of several queries.
         
-        If the question asks about time-related information (like resolution times, response times, etc.), be sure to include that in your answer.
+        The queries that need the vector index are embedded together and
+        searched with one multi-row search.
         
-        If the question asks about specific locations or taluks, provide that geographic information in your answer.
+        Args:
+            queries (List[str]): The query strings
+            k (int): Number of chunks to retrieve per query
+            filters (Dict[str, Any], optional): Metadata filters shared by all queries
+            
+        Returns:
+            List[Tuple[List[Dict], str]]: Chunks and retrieval mode per query (see retrieve)
+        """
+        self._require("vector_store")
+        candidates = self.metadata_index.match(filters)
+        if candidates is not None:
+            k = min(k, int(candidates.sum()))
+        depth = k * HYBRID_CANDIDATES_PER_RESULT
         
-        If the question asks for a comparison between different incident types, locations, or time periods, structure your answer to clearly show the comparison.
+        keyword = [self.is_keyword_query(query) for query in queries]
+        hybrid = [i for i, is_keyword in enumerate(keyword) if not is_keyword] if k > 0 else []
+        vector_rankings = {}
+        if hybrid:
+            self._require("embedding_model")
+            query_embeddings = self.embed_queries([queries[i] for i in hybrid])
+            vector_rankings = dict(zip(hybrid, self._vector_search(query_embeddings, depth, candidates)))
         
-        If you don't know the answer or the information is not in the provided data, say "I don't have enough information to answer this question."
+        results = []
+        for i, query in enumerate(queries):
+            if k <= 0:
+                positions = []
+            elif keyword[i]:
+                positions = self.lexical_index.search(query, k, candidates)[0]
+            else:
+                fused = {}
+                for ranking in (vector_rankings[i], self.lexical_index.search(query, depth, candidates)[0]):
+                    for rank, position in enumerate(ranking.tolist()):
+                        fused[position] = fused.get(position, 0.0) + 1.0 / (RRF_K + rank + 1)
+                positions = sorted(fused, key=lambda position: (-fused[position], position))[:k]
+            mode = "lexical" if keyword[i] else "hybrid"
+            results.append(([self.chunks[int(position)] for position in positions], mode))
+        return results
+    
+    def retrieve_relevant_chunks(self, query: str, k: int = 5,
+                                 filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Retrieve the k most relevant chunks for a query.
         
-        ANSWER:
+        Args:
+            query (str): The query string
+            k (int): Number of chunks to retrieve
+            filters (Dict[str, Any], optional): Metadata filters (see MetadataIndex.match)
+            
+        Returns:
+            List[Dict]: List of relevant chunks with metadata
         """
+        return self.retrieve(query, k, filters)[0]
+    
+    def build_context(self, query: str, relevant_chunks: List[Dict]) -> Dict[str, Any]:
+        """
+        Deduplicated, cleaned context of the relevant chunks within the token budget.
         
-        prompt = PromptTemplate(
+        Args:
+            query (str): The query string
+            relevant_chunks (List[Dict]): Relevant chunks, best first
+            
+        Returns:
+            Dict[str, Any]: Context from ContextBuilder.build, with the full
+            "prompt" and its estimated "prompt_tokens"
+        """
+        context = self.context_builder.build(relevant_chunks)
+        context["prompt"] = PromptTemplate(
             input_variables=["context", "query"],
-            template=template
-        )
+            template=ANSWER_TEMPLATE
+        ).format(context=context["text"], query=query)
+        context["prompt_tokens"] = estimate_tokens(context["prompt"])
+        return context
+    
+    def generate_answer(self, query: str, relevant_chunks: List[Dict], model: Optional[str] = None,
+                        context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate an answer to the query using the relevant chunks and Ollama.
         
-        # Create chain
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        Args:
+            query (str): The query string
+            relevant_chunks (List[Dict]): List of relevant chunks
+            model (str, optional): Ollama model to use (defaults to model_name)
+            context (Dict[str, Any], optional): Context already built by build_context
+            
+        Returns:
+            str: Generated answer
+        """
+        llm = self.llm_pool.get(model or self.model_name)
+            
+        # Prepare context from chunks
+        if context is None:
+            context = self.build_context(query, relevant_chunks)
         
-        # Run chain
-        response = chain.run(context=context, query=query)
+        # Send the exact prompt whose tokens build_context counted
+        return llm.invoke(context["prompt"])
+    
+    def route_query(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer count, ranking and average questions exactly from the incident aggregates.
         
-        return response
+        Args:
+            query (str): The query string
+            filters (Dict[str, Any], optional): Metadata filters (see MetadataIndex.match)
+            
+        Returns:
+            Dict[str, Any]: Response in the layout of process_query, or None if
+            the question needs retrieval and the LLM
+        """
+        self._require("vector_store")
+        routed = self.router.route(query, filters)
+        if routed is None:
+            return None
+        return {
+            "query": query,
+            "answer": routed["answer"],
+            "relevant_chunks": [],
+            "num_chunks_retrieved": 0,
+            "route": "aggregate",
+            "intent": routed["intent"],
+            "aggregate": routed["data"]
+        }
     
-    def process_query(self, query: str, k: int = 5) -> Dict[str, Any]:
+    def process_query(self, query: str, k: int = 5, model: Optional[str] = None,
+                      filters: Optional[Dict[str, Any]] = None, route: bool = True) -> Dict[str, Any]:
         """
         Process a query and return the answer along with relevant chunks.
         
+        Aggregate questions are answered from the incident aggregates without
+        retrieval or the LLM; "route" in the response tells which path was taken.
+        
         Args:
             query (str): The query string
             k (int): Number of chunks to retrieve
+            model (str, optional): Ollama model to use (defaults to model_name)
+            filters (Dict[str, Any], optional): Metadata filters (see MetadataIndex.match)
+            route (bool): Try the aggregate router before retrieval
             
         Returns:
             Dict[str, Any]: Dictionary containing the answer and relevant chunks
         """
+        if route:
+            routed = self.route_query(query, filters)
+            if routed is not None:
+                return routed
+        
         # Retrieve relevant chunks
-        relevant_chunks = self.retrieve_relevant_chunks(query, k)
+        relevant_chunks, retrieval_mode = self.retrieve(query, k, filters)
         
-        # Generate answer
-        answer = self.generate_answer(query, relevant_chunks)
+        # Generate answer from the packed context
+        context = self.build_context(query, relevant_chunks)
+        answer = self.generate_answer(query, relevant_chunks, model, context)
         
         # Prepare response
         response = {
             "query": query,
             "answer": answer,
             "relevant_chunks": relevant_chunks,
-            "num_chunks_retrieved": len(relevant_chunks)
+            "num_chunks_retrieved": len(relevant_chunks),
+            "retrieval_mode": retrieval_mode,
+            "route": "rag",
+            "prompt_tokens": context["prompt_tokens"],
+            "context": context_stats(context)
         }
         
         return response
+    
+    def stream_query(self, query: str, k: int = 5, model: Optional[str] = None,
+                     filters: Optional[Dict[str, Any]] = None, route: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Process a query, yielding events as soon as each stage produces output.
+        
+        Yields a "chunks" event with the retrieved chunks, one "token" event per
+        generated token and a final "done" event with the answer and timings.
+        Aggregate questions yield their whole answer as a single token.
+        
+        Args:
+            query (str): The query string
+            k (int): Number of chunks to retrieve
+            model (str, optional): Ollama model to use (defaults to model_name)
+            filters (Dict[str, Any], optional): Metadata filters (see MetadataIndex.match)
+            route (bool): Try the aggregate router before retrieval
+            
+        Yields:
+            Dict[str, Any]: Event with an "event" name and its payload
+        """
+        start_time = time.time()
+        routed = self.route_query(query, filters) if route else None
+        if routed is not None:
+            end_time = time.time()
+            yield {
+                "event": "chunks",
+                "query": query,
+                "relevant_chunks": [],
+                "num_chunks_retrieved": 0,
+                "route": "aggregate",
+                "intent": routed["intent"],
+                "aggregate": routed["aggregate"]
+            }
+            yield {"event": "token", "text": routed["answer"]}
+            yield {
+                "event": "done",
+                "answer": routed["answer"],
+                "timing": {
+                    "retrieval_ms": (end_time - start_time) * 1000,
+                    "first_token_ms": (end_time - start_time) * 1000,
+                    "generation_ms": 0.0,
+                    "total_ms": (end_time - start_time) * 1000
+                }
+            }
+            return
+        
+        llm = self.llm_pool.get(model or self.model_name)
+        relevant_chunks, retrieval_mode = self.retrieve(query, k, filters)
+        retrieval_time = time.time()
+        yield {
+            "event": "chunks",
+            "query": query,
+            "relevant_chunks": relevant_chunks,
+            "num_chunks_retrieved": len(relevant_chunks),
+            "retrieval_mode": retrieval_mode,
+            "route": "rag"
+        }
+        
+        context = self.build_context(query, relevant_chunks)
+        prompt = context["prompt"]
+        
+        tokens = []
+        first_token_time = None
+        for token in llm.stream(prompt):
+            if first_token_time is None:
+                first_token_time = time.time()
+            tokens.append(token)
+            yield {"event": "token", "text": token}
+        end_time = time.time()
+        
+        yield {
+            "event": "done",
+            "answer": "".join(tokens),
+            "prompt_tokens": context["prompt_tokens"],
+            "context": context_stats(context),
+            "timing": {
+                "retrieval_ms": (retrieval_time - start_time) * 1000,
+                "first_token_ms": (first_token_time - start_time) * 1000 if first_token_time else None,
+                "generation_ms": (end_time - retrieval_time) * 1000,
+                "total_ms": (end_time - start_time) * 1000
+            }
+        }
+
+    def process_batch(self, queries: List[str], k: int = 5, model: Optional[str] = None,
+                      filters: Optional[Dict[str, Any]] = None,
+                      concurrency: int = BATCH_LLM_CONCURRENCY) -> Iterator[Dict[str, Any]]:
+        """
+        Process several queries, yielding each result as soon as it is ready.
+        
+        Aggregate questions are answered first. The other queries share one
+        embedding call and one multi-row index search, and their answers are
+        generated with at most concurrency LLM calls at a time. Yields one
+        "result" (or "error") event per query, in completion order, with the
+        query's index in the batch, and a final "done" event with timings.
+        
+        Args:
+            queries (List[str]): The query strings
+            k (int): Number of chunks to retrieve per query
+            model (str, optional): Ollama model to use (defaults to model_name)
+            filters (Dict[str, Any], optional): Metadata filters shared by all queries
+            concurrency (int): Maximum number of concurrent LLM generations
+            
+        Yields:
+            Dict[str, Any]: Event with an "event" name and its payload
+        """
+        start_time = time.time()
+        pending = []
+        for index, query in enumerate(queries):
+            routed = self.route_query(query, filters)
+            if routed is None:
+                pending.append(index)
+            else:
+                yield dict(routed, event="result", index=index,
+                           timing={"total_ms": (time.time() - start_time) * 1000})
+        
+        retrieval_ms = 0.0
+        if pending:
+            self.llm_pool.get(model or self.model_name)
+            retrieval_start = time.time()
+            retrieved = self.retrieve_many([queries[index] for index in pending], k, filters)
+            retrieval_ms = (time.time() - retrieval_start) * 1000
+            
+            generation_pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch-llm")
+            try:
+                futures = {}
+                for index, (relevant_chunks, retrieval_mode) in zip(pending, retrieved):
+                    context = self.build_context(queries[index], relevant_chunks)
+                    future = generation_pool.submit(self.generate_answer, queries[index], relevant_chunks,
+                                                    model, context)
+                    futures[future] = (index, relevant_chunks, retrieval_mode, context)
+                for future in as_completed(futures):
+                    index, relevant_chunks, retrieval_mode, context = futures[future]
+                    try:
+                        answer = future.result()
+                    except Exception as e:
+                        yield {"event": "error", "index": index, "query": queries[index], "detail": str(e)}
+                        continue
+                    yield {
+                        "event": "result",
+                        "index": index,
+                        "query": queries[index],
+                        "answer": answer,
+                        "relevant_chunks": relevant_chunks,
+                        "num_chunks_retrieved": len(relevant_chunks),
+                        "retrieval_mode": retrieval_mode,
+                        "route": "rag",
+                        "prompt_tokens": context["prompt_tokens"],
+                        "timing": {"total_ms": (time.time() - start_time) * 1000}
+                    }
+            finally:
+                # Generations not yet started are dropped if the caller stops early
+                generation_pool.shutdown(wait=False, cancel_futures=True)
+        
+        yield {
+            "event": "done",
+            "num_queries": len(queries),
+            "num_routed": len(queries) - len(pending),
+            "timing": {
+                "retrieval_ms": retrieval_ms,
+                "total_ms": (time.time() - start_time) * 1000
+            }
+        }
 
 # Example usage
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ import subprocess
 from data_preprocessing import DataPreprocessor
 from text_embedding import TextProcessor
 from retriever import IncidentRetriever
+from vector_index import INDEX_TYPES, DEFAULT_INDEX_TYPE
+from batch_embedding import DEFAULT_BATCH_SIZE
 
 def parse_args():
     """Parse command line arguments"""
@@ -14,6 +16,17 @@ def parse_args():
     parser.add_argument("--test-query", action="store_true", help="Test a sample query")
     parser.add_argument("--start-api", action="store_true", help="Start the API server")
     parser.add_argument("--all", action="store_true", help="Run all steps")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only embed new or changed records in the embedding step")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Chunks per embedding batch")
+    parser.add_argument("--embed-workers", type=int, default=1,
+                        help="Embedding worker processes (0 uses one per CPU core)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=DEFAULT_INDEX_TYPE,
+                        help="FAISS index type built by the embedding step")
+    parser.add_argument("--nlist", type=int, help="Number of IVF lists (IVF index types)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists searched per query")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW candidate list size per query")
     
     return parser.parse_args()
 
@@ -27,6 +40,8 @@ def run_preprocessing():
     data_dir = os.path.join(backend_dir, "data")
     csv_path = os.path.join(os.path.dirname(backend_dir), "modified_dataset.csv")
     output_path = os.path.join(data_dir, "processed_incidents.csv")
+    gazetteer_path = os.path.join(data_dir, "gazetteer.csv")
+    geocode_cache_path = os.environ.get("GEOCODE_CACHE_PATH", os.path.join(data_dir, "geocode_cache.sqlite"))
     
     # Ensure data directory exists
     os.makedirs(data_dir, exist_ok=True)
@@ -35,6 +50,7 @@ def run_preprocessing():
     preprocessor = DataPreprocessor(csv_path=csv_path)
     preprocessor.load_data()
     preprocessor.clean_data()
+    preprocessor.geocode_locations(gazetteer_path, geocode_cache_path)
     preprocessor.save_processed_data(output_path)
     
     # Print stats
@@ -52,7 +68,8 @@ def run_preprocessing():
     
     return output_path.replace('.csv', '.json')
 
-def run_embedding(json_path):
+def run_embedding(json_path, index_type=DEFAULT_INDEX_TYPE, index_options=None, incremental=False,
+                  batch_size=DEFAULT_BATCH_SIZE, embed_workers=1):
     """Run the text embedding step"""
     print("\n===== Step 2: Text Chunking and Embedding =====")
     
@@ -62,13 +79,23 @@ def run_embedding(json_path):
     vector_store_dir = os.path.join(data_dir, "vector_store")
     
     # Create processor and run
-    processor = TextProcessor(json_path)
+    os.makedirs(vector_store_dir, exist_ok=True)
+    processor = TextProcessor(
+        json_path,
+        index_type=index_type,
+        index_options=index_options,
+        embedding_batch_size=batch_size,
+        embedding_workers=embed_workers or os.cpu_count() or 1,
+        embeddings_path=os.path.join(vector_store_dir, "embeddings.npy")
+    )
     processor.load_data()
     processor.create_chunks()
-    processor.initialize_embedding_model()
-    processor.generate_embeddings()
-    processor.create_faiss_index()
-    processor.save_processed_data(vector_store_dir)
+    if incremental:
+        processor.update_vector_store(vector_store_dir)
+    else:
+        processor.generate_embeddings()
+        processor.create_faiss_index()
+        processor.save_processed_data(vector_store_dir)
     
     print("\nText embedding completed successfully!")
     print(f"Vector store saved to {vector_store_dir}")
@@ -96,6 +123,7 @@ def test_query(vector_store_dir):
         response = retriever.process_query(query, k=10)
         
         print(f"\nAnswer: {response['answer']}")
+        print(f"Answered by: {response['route']}")
         print(f"Number of relevant chunks: {response['num_chunks_retrieved']}")
         print("-" * 50)
     
@@ -143,7 +171,11 @@ def main():
         
         # Run text embedding if specified
         if args.embed:
-            vector_store_dir = run_embedding(json_path)
+            index_options = {"nprobe": args.nprobe, "ef_search": args.ef_search}
+            if args.nlist:
+                index_options["nlist"] = args.nlist
+            vector_store_dir = run_embedding(json_path, args.index_type, index_options, args.incremental,
+                                             args.batch_size, args.embed_workers)
         
         # Get vector store dir if not from embedding
         if vector_store_dir is None and (args.test_query or args.start_api):
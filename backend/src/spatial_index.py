@@ -0,0 +1,232 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# At and above this zoom individual points are returned instead of clusters
+CLUSTER_MAX_ZOOM = 13
+
+# Each cache tile is split into CLUSTER_CELLS_PER_TILE x CLUSTER_CELLS_PER_TILE cluster cells
+CLUSTER_CELLS_PER_TILE = 4
+
+# Size of the base grid cells in degrees
+GRID_CELL_DEGREES = 0.01
+
+# Maximum number of cached tiles
+TILE_CACHE_SIZE = 4096
+
+# Maximum number of tiles a single bounding-box query may touch
+MAX_QUERY_TILES = 1024
+
+# Maximum number of individual incidents returned by an unclustered query
+MAX_QUERY_POINTS = 500
+
+# Supported map zoom levels
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+
+def tile_size(zoom: int) -> float:
+    """
+    Size of a cache tile in degrees at a zoom level.
+    """
+    return 360.0 / 2 ** zoom
+
+class SpatialGridIndex:
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray,
+                 cell_degrees: float = GRID_CELL_DEGREES, cache_size: int = TILE_CACHE_SIZE):
+        """
+        Uniform grid index over incident coordinates with per-tile clustering.
+
+        Points are sorted by grid cell key so that each grid row of a bounding box
+        is a contiguous slice found with a binary search.
+
+        Args:
+            latitudes (np.ndarray): Latitude per row (NaN if unknown)
+            longitudes (np.ndarray): Longitude per row (NaN if unknown)
+            cell_degrees (float): Grid cell size in degrees
+            cache_size (int): Maximum number of cached tiles
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = ~np.isnan(latitudes) & ~np.isnan(longitudes)
+
+        self.cell_degrees = cell_degrees
+        self.num_cols = int(np.ceil(360.0 / cell_degrees)) + 1
+        rows = np.flatnonzero(valid).astype(np.int32)
+        cell_x, cell_y = self._cells(latitudes[valid], longitudes[valid])
+        keys = cell_y * self.num_cols + cell_x
+
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.rows = rows[order]
+        self.latitudes = latitudes[valid][order]
+        self.longitudes = longitudes[valid][order]
+
+        if len(self.rows):
+            self.cell_bounds = (int(cell_x.min()), int(cell_x.max()), int(cell_y.min()), int(cell_y.max()))
+        else:
+            self.cell_bounds = (0, -1, 0, -1)
+
+        self.cache_size = cache_size
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _cells(self, latitudes, longitudes) -> Tuple[np.ndarray, np.ndarray]:
+        cell_x = np.floor((np.asarray(longitudes) + 180.0) / self.cell_degrees).astype(np.int64)
+        cell_y = np.floor((np.asarray(latitudes) + 90.0) / self.cell_degrees).astype(np.int64)
+        return cell_x, cell_y
+
+    def _points_in_bbox(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float,
+                        half_open: bool = False) -> np.ndarray:
+        """
+        Positions (into the sorted arrays) of points inside a bounding box.
+        """
+        cell_x, cell_y = self._cells([min_lat, max_lat], [min_lng, max_lng])
+        x0, x1 = int(cell_x[0]), int(cell_x[1])
+        y0, y1 = int(cell_y[0]), int(cell_y[1])
+        bx0, bx1, by0, by1 = self.cell_bounds
+        x0, x1 = max(x0, bx0), min(x1, bx1)
+        y0, y1 = max(y0, by0), min(y1, by1)
+        if x0 > x1 or y0 > y1:
+            return np.empty(0, dtype=np.int64)
+
+        # Each grid row of the box is one contiguous key range
+        row_keys = np.arange(y0, y1 + 1, dtype=np.int64) * self.num_cols
+        starts = np.searchsorted(self.keys, row_keys + x0, side='left')
+        ends = np.searchsorted(self.keys, row_keys + x1, side='right')
+        if not len(starts) or not (ends - starts).any():
+            return np.empty(0, dtype=np.int64)
+        positions = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends) if end > start])
+
+        lat = self.latitudes[positions]
+        lng = self.longitudes[positions]
+        if half_open:
+            mask = (lng >= min_lng) & (lng < max_lng) & (lat >= min_lat) & (lat < max_lat)
+        else:
+            mask = (lng >= min_lng) & (lng <= max_lng) & (lat >= min_lat) & (lat <= max_lat)
+        return positions[mask]
+
+    def _build_tile(self, zoom: int, tile_x: int, tile_y: int) -> Dict[str, Any]:
+        """
+        Clusters and single points of one tile at a (clustered) zoom level.
+        """
+        size = tile_size(zoom)
+        min_lng = -180.0 + tile_x * size
+        min_lat = -90.0 + tile_y * size
+        positions = self._points_in_bbox(min_lng, min_lat, min_lng + size, min_lat + size, half_open=True)
+
+        if len(positions) == 0:
+            return {'clusters': [], 'positions': positions}
+
+        cells = CLUSTER_CELLS_PER_TILE
+        cell_size = size / cells
+        lat = self.latitudes[positions]
+        lng = self.longitudes[positions]
+        cell_x = np.clip(((lng - min_lng) / cell_size).astype(np.int64), 0, cells - 1)
+        cell_y = np.clip(((lat - min_lat) / cell_size).astype(np.int64), 0, cells - 1)
+        cell = cell_y * cells + cell_x
+
+        counts = np.bincount(cell, minlength=cells * cells)
+        lat_sums = np.bincount(cell, weights=lat, minlength=cells * cells)
+        lng_sums = np.bincount(cell, weights=lng, minlength=cells * cells)
+
+        clusters = []
+        for code in np.flatnonzero(counts > 1):
+            clusters.append({
+                'latitude': float(lat_sums[code] / counts[code]),
+                'longitude': float(lng_sums[code] / counts[code]),
+                'count': int(counts[code]),
+                'bounds': [
+                    min_lng + (code % cells) * cell_size,
+                    min_lat + (code // cells) * cell_size,
+                    min_lng + (code % cells + 1) * cell_size,
+                    min_lat + (code // cells + 1) * cell_size
+                ]
+            })
+        # Cells with a single incident are returned as points
+        singles = positions[counts[cell] == 1]
+        return {'clusters': clusters, 'positions': singles}
+
+    def _tile(self, zoom: int, tile_x: int, tile_y: int) -> Dict[str, Any]:
+        key = (zoom, tile_x, tile_y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+        tile = self._build_tile(zoom, tile_x, tile_y)
+        with self._lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > self.cache_size:
+                self._tiles.popitem(last=False)
+        return tile
+
+    def query(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Clusters and individual incidents visible in a bounding box at a zoom level.
+
+        Below CLUSTER_MAX_ZOOM, incidents sharing a cluster cell are aggregated
+        into clusters; otherwise the individual points are returned, at most
+        MAX_QUERY_POINTS of them.
+
+        Args:
+            zoom (int): Map zoom level (MIN_ZOOM to MAX_ZOOM)
+            bbox (Tuple[float, float, float, float], optional): (min_lng, min_lat, max_lng, max_lat)
+
+        Returns:
+            Tuple[List[Dict[str, Any]], np.ndarray]: Clusters and row ids of individual incidents
+
+        Raises:
+            ValueError: If the zoom or box is invalid, the box covers more than
+            MAX_QUERY_TILES tiles, or an unclustered query has too many incidents
+        """
+        if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+            raise ValueError(f"Zoom must be between {MIN_ZOOM} and {MAX_ZOOM}")
+        if bbox is None:
+            bbox = (-180.0, -90.0, 180.0, 90.0)
+        if not np.isfinite(bbox).all():
+            raise ValueError("Bounding box values must be finite numbers")
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if len(self.rows) == 0 or min_lng > max_lng or min_lat > max_lat:
+            return [], np.empty(0, dtype=np.int32)
+
+        # Restrict the covering tiles to the extent of the data
+        size = tile_size(zoom)
+        bx0, bx1, by0, by1 = self.cell_bounds
+        data_min_lng = bx0 * self.cell_degrees - 180.0
+        data_max_lng = (bx1 + 1) * self.cell_degrees - 180.0
+        data_min_lat = by0 * self.cell_degrees - 90.0
+        data_max_lat = (by1 + 1) * self.cell_degrees - 90.0
+        tx0 = int(np.floor((max(min_lng, data_min_lng) + 180.0) / size))
+        tx1 = int(np.floor((min(max_lng, data_max_lng) + 180.0) / size))
+        ty0 = int(np.floor((max(min_lat, data_min_lat) + 90.0) / size))
+        ty1 = int(np.floor((min(max_lat, data_max_lat) + 90.0) / size))
+        if tx0 > tx1 or ty0 > ty1:
+            return [], np.empty(0, dtype=np.int32)
+        if (tx1 - tx0 + 1) * (ty1 - ty0 + 1) > MAX_QUERY_TILES:
+            raise ValueError("Bounding box covers too many tiles for this zoom level")
+
+        # Individual points come straight from the grid
+        if zoom >= CLUSTER_MAX_ZOOM:
+            positions = self._points_in_bbox(min_lng, min_lat, max_lng, max_lat)
+            if len(positions) > MAX_QUERY_POINTS:
+                raise ValueError(f"Bounding box contains more than {MAX_QUERY_POINTS} incidents; "
+                                 "use a smaller box or a lower zoom level")
+            return [], np.sort(self.rows[positions])
+
+        clusters = []
+        positions = []
+        for tile_x in range(tx0, tx1 + 1):
+            for tile_y in range(ty0, ty1 + 1):
+                tile = self._tile(zoom, tile_x, tile_y)
+                clusters.extend(tile['clusters'])
+                positions.append(tile['positions'])
+        positions = np.concatenate(positions)
+
+        # Individual points are clipped to the requested box
+        lat = self.latitudes[positions]
+        lng = self.longitudes[positions]
+        positions = positions[(lng >= min_lng) & (lng <= max_lng) & (lat >= min_lat) & (lat <= max_lat)]
+        return clusters, np.sort(self.rows[positions])
@@ -1,14 +1,31 @@
 import os
 import json
+import hashlib
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
 import faiss
+from chunk_store import ChunkStore, CHUNK_STORE_DIR
+from bm25_index import BM25Index, BM25_DIR
+from warm_start import source_signature
+from vector_index import build_index, evaluate_index, configure_search, DEFAULT_INDEX_TYPE
+from batch_embedding import embed_texts, DEFAULT_BATCH_SIZE
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# FAISS id of a chunk: sl_no * CHUNK_ID_STRIDE + chunk number within the record
+CHUNK_ID_STRIDE = 1000
+
+# Content hashes of embedded records, used by incremental updates
+MANIFEST_FILE = "manifest.json"
 
 class TextProcessor:
-    def __init__(self, data_path: str, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, data_path: str, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 index_type: str = DEFAULT_INDEX_TYPE, index_options: Optional[Dict[str, Any]] = None,
+                 embedding_batch_size: int = DEFAULT_BATCH_SIZE, embedding_workers: int = 1,
+                 embeddings_path: Optional[str] = None):
         """
         Initialize the TextProcessor with the path to the processed data.
         
@@ -16,12 +33,27 @@ class TextProcessor:
             data_path (str): Path to the processed data (JSON format)
             chunk_size (int): Size of text chunks for embedding
             chunk_overlap (int): Overlap between chunks
+            index_type (str): FAISS index type (see vector_index.INDEX_TYPES)
+            index_options (Dict[str, Any], optional): Extra arguments for vector_index.build_index
+                (nlist, nprobe, pq_m, hnsw_m, ef_search, ...)
+            embedding_batch_size (int): Chunks per embedding batch
+            embedding_workers (int): Embedding worker processes (1 embeds in this process)
+            embeddings_path (str, optional): Memory-mapped .npy file the embeddings are written to
         """
         self.data_path = data_path
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.index_type = index_type
+        self.index_options = index_options or {}
+        self.index_config = None
+        self.index_report = None
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_workers = embedding_workers
+        self.embeddings_path = embeddings_path
         self.data = None
         self.chunks = []
+        self.chunk_ids = []
+        self.record_hashes = {}
         self.embeddings = None
         self.embedding_model = None
         self.vector_store = None
@@ -56,6 +88,8 @@ class TextProcessor:
         )
         
         self.chunks = []
+        self.chunk_ids = []
+        self.record_hashes = {}
         
         for i, record in enumerate(self.data):
             # Create a comprehensive text representation of the record
@@ -105,12 +139,23 @@ class TextProcessor:
             # Split the text into chunks
             doc_chunks = text_splitter.create_documents([text], [{"source": i, "record": record}])
             
+            if len(doc_chunks) > CHUNK_ID_STRIDE:
+                raise ValueError(f"Record {record.get('sl_no', i)} has more than {CHUNK_ID_STRIDE} chunks")
+            
+            # Chunk ids and content hash are keyed by sl_no
+            sl_no = int(record.get('sl_no', i))
+            if sl_no in self.record_hashes:
+                raise ValueError(f"Duplicate sl_no {sl_no} in {self.data_path}")
+            content = hashlib.sha1("\0".join(chunk.page_content for chunk in doc_chunks).encode('utf-8'))
+            self.record_hashes[sl_no] = [content.hexdigest(), len(doc_chunks)]
+            
             # Add chunks to the list
-            for chunk in doc_chunks:
+            for number, chunk in enumerate(doc_chunks):
                 self.chunks.append({
                     "text": chunk.page_content,
                     "metadata": chunk.metadata
                 })
+                self.chunk_ids.append(sl_no * CHUNK_ID_STRIDE + number)
         
         print(f"Created {len(self.chunks)} chunks from {len(self.data)} records")
         return self.chunks
@@ -124,7 +169,7 @@ class TextProcessor:
         """
         print("Initializing embedding model...")
         self.embedding_model = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
+            model_name=EMBEDDING_MODEL,
             model_kwargs={'device': 'cpu'},
             encode_kwargs={'normalize_embeddings': True}
         )
@@ -135,21 +180,35 @@ class TextProcessor:
         """
         Generate embeddings for all chunks.
         
+        Chunks are embedded in batches, across embedding_workers processes, into
+        one float32 array (memory-mapped to embeddings_path if set).
+        
         Returns:
             np.ndarray: Array of embeddings
         """
         if not self.chunks:
             self.create_chunks()
             
-        if self.embedding_model is None:
+        if self.embedding_model is None and self.embedding_workers <= 1:
             self.initialize_embedding_model()
             
-        print("Generating embeddings...")
+        print(f"Generating embeddings (batches of {self.embedding_batch_size}, "
+              f"{self.embedding_workers} worker(s))...")
         texts = [chunk["text"] for chunk in self.chunks]
-        self.embeddings = self.embedding_model.embed_documents(texts)
+        self.embeddings = self._embed(texts, self.embeddings_path)
         print(f"Generated {len(self.embeddings)} embeddings")
         return self.embeddings
     
+    def _embed(self, texts: List[str], output_path: Optional[str] = None) -> np.ndarray:
+        return embed_texts(
+            texts,
+            EMBEDDING_MODEL,
+            batch_size=self.embedding_batch_size,
+            num_workers=self.embedding_workers,
+            output_path=output_path,
+            model=self.embedding_model
+        )
+    
     def create_faiss_index(self):
         """
         Create a FAISS index from the embeddings.
@@ -160,12 +219,23 @@ class TextProcessor:
         if self.embeddings is None:
             self.generate_embeddings()
             
-        print("Creating FAISS index...")
-        embedding_dim = len(self.embeddings[0])
-        index = faiss.IndexFlatL2(embedding_dim)
-        index.add(np.array(self.embeddings).astype('float32'))
+        print(f"Creating FAISS index ({self.index_type})...")
+        embeddings = np.asarray(self.embeddings, dtype=np.float32)
+        embedding_dim = embeddings.shape[1]
+        ids = np.array(self.chunk_ids, dtype=np.int64)
+        index, self.index_config = build_index(embeddings, self.index_type, ids=ids, **self.index_options)
         self.vector_store = index
         print(f"Created FAISS index with {index.ntotal} vectors of dimension {embedding_dim}")
+        
+        # Compare against an exact search
+        self.index_report = evaluate_index(index, embeddings, self.index_config, ids=ids)
+        print(f"Recall@{self.index_report['k']}: {self.index_report['recall_at_k']:.3f}, "
+              f"{self.index_report['latency_ms']:.3f} ms/query "
+              f"(exact search: {self.index_report['baseline_latency_ms']:.3f} ms/query), "
+              f"{self.index_report['index_bytes']} bytes")
+        for point in self.index_report["sweep"]:
+            setting = ", ".join(f"{name}={value}" for name, value in point.items() if name not in ("recall_at_k", "latency_ms"))
+            print(f"  {setting}: recall {point['recall_at_k']:.3f}, {point['latency_ms']:.3f} ms/query")
         return index
     
     def save_processed_data(self, output_dir: str):
@@ -187,6 +257,16 @@ class TextProcessor:
             json.dump(self.chunks, f)
         print(f"Saved chunks to {chunks_path}")
         
+        # Save the memory-mapped chunk store the retriever reads
+        store_dir = os.path.join(output_dir, CHUNK_STORE_DIR)
+        ChunkStore.write(store_dir, self.chunks, source_signature([chunks_path]), self.chunk_ids)
+        print(f"Saved chunk store to {store_dir}")
+        
+        # Save the BM25 index used for keyword and hybrid retrieval
+        bm25_dir = os.path.join(output_dir, BM25_DIR)
+        BM25Index.write(bm25_dir, [chunk["text"] for chunk in self.chunks], source_signature([chunks_path]))
+        print(f"Saved BM25 index to {bm25_dir}")
+        
         # Save FAISS index
         index_path = os.path.join(output_dir, "faiss_index.bin")
         faiss.write_index(self.vector_store, index_path)
@@ -194,17 +274,121 @@ class TextProcessor:
         
         # Save metadata about the embeddings
         metadata = {
-            "embedding_model": "all-MiniLM-L6-v2",
+            "embedding_model": EMBEDDING_MODEL,
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
             "num_chunks": len(self.chunks),
-            "embedding_dim": len(self.embeddings[0]) if self.embeddings else None
+            "embedding_dim": self.vector_store.d,
+            "index": self.index_config,
+            "index_report": self.index_report
         }
         
         metadata_path = os.path.join(output_dir, "embedding_metadata.json")
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f)
         print(f"Saved embedding metadata to {metadata_path}")
+        
+        # Save the content hash of every embedded record
+        manifest = {
+            "embedding_model": EMBEDDING_MODEL,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "index_type": self.index_config["type"],
+            "records": {str(sl_no): value for sl_no, value in self.record_hashes.items()}
+        }
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        print(f"Saved manifest to {manifest_path}")
+    
+    def update_vector_store(self, output_dir: str) -> Dict[str, int]:
+        """
+        Incrementally update a vector store saved by save_processed_data.
+        
+        Records are compared with the manifest by the hash of their chunk texts.
+        Only new and changed records are embedded; vectors of changed and deleted
+        records are removed by id. Falls back to a full rebuild when there is no
+        compatible manifest or index.
+        
+        Args:
+            output_dir (str): Directory of the vector store
+            
+        Returns:
+            Dict[str, int]: Number of added, changed, removed and unchanged records
+        """
+        if not self.chunks:
+            self.create_chunks()
+        
+        manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        index_path = os.path.join(output_dir, "faiss_index.bin")
+        metadata_path = os.path.join(output_dir, "embedding_metadata.json")
+        manifest = None
+        if os.path.exists(manifest_path) and os.path.exists(index_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        settings = (EMBEDDING_MODEL, self.chunk_size, self.chunk_overlap, self.index_type)
+        if manifest is None or settings != (manifest["embedding_model"], manifest["chunk_size"],
+                                            manifest["chunk_overlap"], manifest["index_type"]):
+            print("No compatible vector store found, rebuilding it")
+            self.generate_embeddings()
+            self.create_faiss_index()
+            self.save_processed_data(output_dir)
+            return {"added": len(self.record_hashes), "changed": 0, "removed": 0, "unchanged": 0}
+        
+        previous = {int(sl_no): value for sl_no, value in manifest["records"].items()}
+        added = [sl_no for sl_no in self.record_hashes if sl_no not in previous]
+        changed = [sl_no for sl_no, value in self.record_hashes.items()
+                   if sl_no in previous and previous[sl_no][0] != value[0]]
+        removed = [sl_no for sl_no in previous if sl_no not in self.record_hashes]
+        stats = {
+            "added": len(added),
+            "changed": len(changed),
+            "removed": len(removed),
+            "unchanged": len(self.record_hashes) - len(added) - len(changed)
+        }
+        print(f"Records: {stats['added']} new, {stats['changed']} changed, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged")
+        
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        self.index_config = metadata.get("index")
+        self.index_report = metadata.get("index_report")
+        
+        stale_ids = [sl_no * CHUNK_ID_STRIDE + number
+                     for sl_no in changed + removed for number in range(previous[sl_no][1])]
+        legacy_ivf = self.index_type.startswith("ivf") and (self.index_config or {}).get("id_map")
+        if stale_ids and (self.index_type == "hnsw" or legacy_ivf):
+            # HNSW graphs do not support removing vectors, and IVF indexes wrapped
+            # in an IndexIDMap (older stores) would mix up ids after a removal
+            print(f"{self.index_type} index cannot remove vectors, rebuilding it")
+            self.generate_embeddings()
+            self.create_faiss_index()
+            self.save_processed_data(output_dir)
+            return stats
+        
+        index = faiss.read_index(index_path)
+        if stale_ids:
+            index.remove_ids(np.array(stale_ids, dtype=np.int64))
+        
+        # Embed only the chunks of new and changed records
+        fresh = set(added + changed)
+        positions = [position for position, chunk_id in enumerate(self.chunk_ids)
+                     if chunk_id // CHUNK_ID_STRIDE in fresh]
+        if positions:
+            if self.embedding_model is None and self.embedding_workers <= 1:
+                self.initialize_embedding_model()
+            print(f"Embedding {len(positions)} chunks...")
+            embeddings = self._embed([self.chunks[p]["text"] for p in positions])
+            index.add_with_ids(
+                embeddings,
+                np.array([self.chunk_ids[p] for p in positions], dtype=np.int64)
+            )
+        configure_search(index, self.index_config or {})
+        self.vector_store = index
+        print(f"Updated FAISS index now holds {index.ntotal} vectors")
+        
+        self.save_processed_data(output_dir)
+        return stats
 
 # Example usage
 if __name__ == "__main__":
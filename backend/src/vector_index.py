@@ -0,0 +1,216 @@
+import time
+import faiss
+import numpy as np
+from typing import Dict, Any, Optional
+
+# Supported index types; all but flat_l2 use inner product on normalized embeddings
+INDEX_TYPES = ["flat_l2", "flat_ip", "ivf_flat", "ivf_pq", "hnsw"]
+
+DEFAULT_INDEX_TYPE = "flat_ip"
+
+# Training points per IVF list and cap on the training sample
+TRAIN_POINTS_PER_LIST = 39
+MAX_TRAIN_SAMPLE = 100000
+
+# Search-time settings swept by evaluate_index
+NPROBE_SWEEP = [1, 2, 4, 8, 16, 32, 64, 128]
+EF_SEARCH_SWEEP = [16, 32, 64, 128, 256, 512]
+
+def default_nlist(num_vectors: int) -> int:
+    """
+    Number of IVF lists for a corpus size (about 4 * sqrt(n), at most n / 39).
+    """
+    nlist = int(4 * np.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // TRAIN_POINTS_PER_LIST))
+
+def default_pq_m(dim: int) -> int:
+    """
+    Number of PQ sub-quantizers: 8-dimensional sub-vectors when the dimension allows it.
+    """
+    for m in (dim // 8, 64, 48, 32, 16, 8, 4, 2, 1):
+        if m >= 1 and dim % m == 0:
+            return m
+    return 1
+
+def build_index(embeddings: np.ndarray, index_type: str = DEFAULT_INDEX_TYPE,
+                nlist: Optional[int] = None, nprobe: int = 8, pq_m: Optional[int] = None,
+                pq_bits: int = 8, hnsw_m: int = 32, ef_construction: int = 200, ef_search: int = 64,
+                train_sample: int = MAX_TRAIN_SAMPLE, seed: int = 0, ids: Optional[np.ndarray] = None):
+    """
+    Build a FAISS index of one of INDEX_TYPES over float32 embeddings.
+
+    IVF quantizers are trained on a random sample of at most train_sample vectors.
+    With ids, vectors can later be removed and added by id: IVF indexes store
+    the ids in their lists, other indexes are wrapped in an IndexIDMap. (An
+    IndexIDMap over an IVF index loses track of ids after a removal, since the
+    IVF lists are not renumbered the way the id map is compacted.)
+
+    Args:
+        embeddings (np.ndarray): (n, dim) float32 embeddings
+        index_type (str): One of INDEX_TYPES
+        nlist (int, optional): Number of IVF lists (default from the corpus size)
+        nprobe (int): IVF lists searched per query
+        pq_m (int, optional): Number of PQ sub-quantizers (default from the dimension)
+        pq_bits (int): Bits per PQ code
+        hnsw_m (int): HNSW neighbours per node
+        ef_construction (int): HNSW candidate list size while building
+        ef_search (int): HNSW candidate list size while searching
+        train_sample (int): Maximum number of vectors used for training
+        seed (int): Seed of the training sample
+        ids (np.ndarray, optional): int64 id per embedding (positions are used if None)
+
+    Returns:
+        Tuple[faiss.Index, Dict[str, Any]]: The index and its configuration (for embedding_metadata.json)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    num_vectors, dim = embeddings.shape
+    config = {"type": index_type, "metric": "l2" if index_type == "flat_l2" else "inner_product"}
+
+    if index_type == "flat_l2":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "flat_ip":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        config.update(hnsw_m=hnsw_m, ef_construction=ef_construction, ef_search=ef_search)
+    else:
+        nlist = nlist or default_nlist(num_vectors)
+        quantizer = faiss.IndexFlatIP(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            pq_m = pq_m or default_pq_m(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits, faiss.METRIC_INNER_PRODUCT)
+            config.update(pq_m=pq_m, pq_bits=pq_bits)
+        config.update(nlist=nlist, nprobe=nprobe)
+
+        sample = embeddings
+        if num_vectors > train_sample:
+            rng = np.random.default_rng(seed)
+            sample = embeddings[np.sort(rng.choice(num_vectors, train_sample, replace=False))]
+        index.train(sample)
+        config["train_size"] = len(sample)
+
+    if ids is not None and index_type.startswith("ivf"):
+        index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+    elif ids is not None:
+        index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype=np.int64))
+        config["id_map"] = True
+    else:
+        index.add(embeddings)
+    configure_search(index, config)
+    return index, config
+
+def configure_search(index, config: Dict[str, Any], nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None):
+    """
+    Apply search-time parameters (nprobe for IVF, efSearch for HNSW) to an index.
+
+    Explicit arguments override the values recorded in config.
+    """
+    parameters = faiss.ParameterSpace()
+    nprobe = nprobe or config.get("nprobe")
+    ef_search = ef_search or config.get("ef_search")
+    if nprobe and config.get("type", "").startswith("ivf"):
+        parameters.set_index_parameter(index, "nprobe", int(nprobe))
+    if ef_search and config.get("type") == "hnsw":
+        parameters.set_index_parameter(index, "efSearch", int(ef_search))
+
+def search_parameters(config: Dict[str, Any], selector, nprobe: Optional[int] = None,
+                      ef_search: Optional[int] = None):
+    """
+    Per-query search parameters restricting a search to the ids accepted by selector.
+
+    The parameter type matches the index type, so nprobe and efSearch are
+    kept (explicit arguments override the values recorded in config).
+    """
+    nprobe = nprobe or config.get("nprobe")
+    ef_search = ef_search or config.get("ef_search")
+    if config.get("type", "").startswith("ivf"):
+        parameters = faiss.SearchParametersIVF()
+        if nprobe:
+            parameters.nprobe = int(nprobe)
+    elif config.get("type") == "hnsw":
+        parameters = faiss.SearchParametersHNSW()
+        if ef_search:
+            parameters.efSearch = int(ef_search)
+    else:
+        parameters = faiss.SearchParameters()
+    parameters.sel = selector
+    return parameters
+
+def evaluate_index(index, embeddings: np.ndarray, config: Optional[Dict[str, Any]] = None,
+                   k: int = 10, num_queries: int = 200, seed: int = 0,
+                   ids: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Recall@k and latency of an index against an exact flat inner-product search.
+
+    Queries are a random sample of the indexed embeddings. For IVF and HNSW
+    indexes, recall and latency are also reported for a sweep of nprobe or
+    efSearch values; the configured value is restored afterwards.
+
+    Args:
+        index (faiss.Index): Index to evaluate
+        embeddings (np.ndarray): The indexed embeddings
+        config (Dict[str, Any], optional): Configuration returned by build_index
+        k (int): Number of neighbours compared
+        num_queries (int): Number of sampled queries
+        seed (int): Seed of the query sample
+        ids (np.ndarray, optional): Ids the embeddings were added with
+
+    Returns:
+        Dict[str, Any]: recall_at_k, per-query latency of the index and the
+        baseline, index sizes and the parameter sweep
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    num_vectors, dim = embeddings.shape
+    config = config or {}
+    k = min(k, num_vectors)
+    rng = np.random.default_rng(seed)
+    queries = embeddings[rng.choice(num_vectors, min(num_queries, num_vectors), replace=False)]
+
+    baseline = faiss.IndexFlatIP(dim)
+    baseline.add(embeddings)
+    start_time = time.perf_counter()
+    _, exact = baseline.search(queries, k)
+    baseline_ms = (time.perf_counter() - start_time) * 1000 / len(queries)
+    if ids is not None:
+        exact = np.asarray(ids, dtype=np.int64)[exact]
+    exact = exact.tolist()
+
+    def measure():
+        start_time = time.perf_counter()
+        _, approximate = index.search(queries, k)
+        latency_ms = (time.perf_counter() - start_time) * 1000 / len(queries)
+        hits = sum(len(set(a) & set(e)) for a, e in zip(approximate.tolist(), exact))
+        return hits / (k * len(queries)), latency_ms
+
+    recall, latency_ms = measure()
+
+    sweep = []
+    if config.get("type", "").startswith("ivf"):
+        for nprobe in [n for n in NPROBE_SWEEP if n <= config["nlist"]]:
+            configure_search(index, config, nprobe=nprobe)
+            sweep.append(dict(zip(["nprobe", "recall_at_k", "latency_ms"], [nprobe, *measure()])))
+        configure_search(index, config)
+    elif config.get("type") == "hnsw":
+        for ef_search in EF_SEARCH_SWEEP:
+            configure_search(index, config, ef_search=ef_search)
+            sweep.append(dict(zip(["ef_search", "recall_at_k", "latency_ms"], [ef_search, *measure()])))
+        configure_search(index, config)
+
+    return {
+        "k": k,
+        "num_queries": len(queries),
+        "recall_at_k": recall,
+        "latency_ms": latency_ms,
+        "baseline_latency_ms": baseline_ms,
+        "index_bytes": len(faiss.serialize_index(index)),
+        "baseline_bytes": len(faiss.serialize_index(baseline)),
+        "sweep": sweep
+    }
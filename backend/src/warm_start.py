@@ -0,0 +1,51 @@
+import os
+import pickle
+from typing import Dict, Any, List, Optional, Tuple
+
+# Bumped whenever the layout of the snapshot changes
+SNAPSHOT_VERSION = 2
+
+def source_signature(paths: List[str]) -> Tuple:
+    """
+    Cheap identity of a set of files (size and modification time of each).
+
+    Args:
+        paths (List[str]): Files the snapshot is derived from
+
+    Returns:
+        Tuple: Signature to compare against the one stored in the snapshot
+    """
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+def read_snapshot(snapshot_path: str, signature: Tuple) -> Optional[Dict[str, Any]]:
+    """
+    Load a warm-start snapshot if it was built from files with this signature.
+
+    Returns:
+        Dict[str, Any]: Snapshot contents, or None if missing, stale or unreadable
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable warm-start snapshot {snapshot_path}: {str(e)}")
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION or snapshot.get('signature') != signature:
+        return None
+    return snapshot
+
+def write_snapshot(snapshot_path: str, signature: Tuple, contents: Dict[str, Any]):
+    """
+    Atomically write a warm-start snapshot for files with this signature.
+    """
+    snapshot = dict(contents, version=SNAPSHOT_VERSION, signature=signature)
+    temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, snapshot_path)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the modules in src/ importable, as app.py and run_pipeline.py do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,82 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import api
+import retriever as retriever_module
+from fake_llm import FAKE_MODEL_NAME
+
+VECTOR_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'vector_store')
+VECTOR_STORE_FILES = ["chunks.json", "embedding_metadata.json", "faiss_index.bin"]
+
+class StubEmbeddings:
+    """Deterministic unit vectors per text, standing in for the sentence-transformers model"""
+    def __init__(self, model_name=None, **kwargs):
+        with open(os.path.join(VECTOR_STORE_DIR, "embedding_metadata.json"), 'r') as f:
+            self.dim = json.load(f)["embedding_dim"]
+
+    def _embed(self, text):
+        rng = np.random.default_rng(int(hashlib.md5(text.lower().encode()).hexdigest()[:8], 16))
+        vector = rng.standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Work on a copy of the committed vector store so derived files stay out of the tree;
+    # the app starts once per module since shutdown stops its query workers
+    tmp_path = tmp_path_factory.mktemp("api")
+    store_dir = tmp_path / "vector_store"
+    store_dir.mkdir()
+    for name in VECTOR_STORE_FILES:
+        shutil.copy(os.path.join(VECTOR_STORE_DIR, name), store_dir / name)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(api, "vector_store_dir", str(store_dir))
+        monkeypatch.setattr(api, "embedding_cache_path", str(tmp_path / "query_embeddings.sqlite"))
+        monkeypatch.setattr(retriever_module, "HuggingFaceEmbeddings", StubEmbeddings)
+        with TestClient(api.app) as test_client:
+            deadline = time.time() + 120
+            while test_client.get("/health").status_code != 200:
+                assert time.time() < deadline, "retriever did not finish loading"
+                time.sleep(0.2)
+            yield test_client
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_query_stream_with_fake_model(client):
+    response = client.post("/query/stream", json={
+        "query": "Tell me about trees blocking roads", "num_chunks": 3, "model": FAKE_MODEL_NAME
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "chunks"
+    assert names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+
+    chunks, done = events[0][1], events[-1][1]
+    assert chunks["route"] == "rag"
+    assert chunks["num_chunks_retrieved"] == len(chunks["relevant_chunks"]) > 0
+    assert done["answer"] == "".join(data["text"] for name, data in events if name == "token")
+    assert done["answer"].startswith("Offline answer to 'Tell me about trees blocking roads'")
+    assert {"retrieval_ms", "first_token_ms", "generation_ms", "total_ms", "response_ms"} <= set(done["timing"])
+
+def test_models_lists_fake_model(client):
+    assert FAKE_MODEL_NAME in client.get("/models").json()["models"]
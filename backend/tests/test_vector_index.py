@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from vector_index import INDEX_TYPES, build_index
+
+def _embeddings(num_vectors=2000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((num_vectors, dim)).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+@pytest.mark.parametrize("index_type", [t for t in INDEX_TYPES if t != "hnsw"])
+def test_search_after_remove_returns_own_ids(index_type):
+    embeddings = _embeddings()
+    ids = np.arange(len(embeddings), dtype=np.int64) * 1000
+    options = {"nprobe": 1024} if index_type.startswith("ivf") else {}
+    index, _ = build_index(embeddings, index_type, ids=ids, **options)
+
+    removed = [3, 10, 11, 1500]
+    index.remove_ids(ids[removed])
+    kept = np.setdiff1d(np.arange(len(embeddings)), removed)
+    queries = kept[::50]
+    _, found = index.search(embeddings[queries], 1)
+
+    # IVF-PQ is approximate, so only require most self-lookups to match
+    matches = np.mean(found[:, 0] == ids[queries])
+    assert matches >= (0.9 if index_type == "ivf_pq" else 1.0)
+    assert not np.isin(found, ids[removed]).any()